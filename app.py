@@ -1,27 +1,22 @@
 # app.py
-from flask import Flask, redirect, url_for
+import logging
+import os
+import threading
+import time
+from flask import Flask, redirect, request, url_for, send_from_directory
 from flask_login import LoginManager, current_user
 from config import Config
-from models.user_model import User
-import os
-
-# Blueprints
-from routes.auth_routes import auth_bp
-from routes.product_routes import product_bp
-from routes.sale_routes import sale_bp
-from routes.analytics_routes import analytics_bp
-from routes.admin_routes import admin_bp  # NEW
 
-app = Flask(__name__)
-app.config.from_object(Config)
+log = logging.getLogger(__name__)
 
 # Flask-Login setup
 login_manager = LoginManager()
 login_manager.login_view = "auth.login"
-login_manager.init_app(app)
 
 @login_manager.user_loader
 def load_user(user_id):
+    from models.user_model import User
+
     if user_id == "admin":
         return User({
             "_id": "admin",
@@ -29,26 +24,88 @@ def load_user(user_id):
             "role": "admin",
             "created_at": None
         })
+    return User.get_by_id(user_id)
+
+
+# Seconds between index creation attempts while MongoDB is unreachable
+INDEX_RETRY_SECONDS = 30
+
+_indexes_lock = threading.Lock()
+_indexes_ready = False
+_indexes_next_try = 0.0
+
+def _create_indexes():
+    global _indexes_ready
+    from models.user_stats_model import UserStats
+    from services import archive, sale_service
     try:
-        obj_id = ObjectId(user_id)
+        UserStats.ensure_indexes()
+        archive.ensure_indexes()
+        sale_service.ensure_indexes()
+        _indexes_ready = True
     except Exception:
-        return None
-    return User.get_by_id(obj_id)
-
-# Register blueprints
-app.register_blueprint(auth_bp)
-app.register_blueprint(product_bp)
-app.register_blueprint(sale_bp)
-app.register_blueprint(analytics_bp)
-app.register_blueprint(admin_bp)  # NEW
-
-@app.route("/")
-def home():
-    if current_user.is_authenticated:
-        if current_user.role == "admin":
-            return redirect(url_for("admin.dashboard"))
-        return redirect(url_for("product.dashboard"))
-    return redirect(url_for("auth.login"))
+        log.exception("Index creation failed; retrying in %ss", INDEX_RETRY_SECONDS)
+
+def ensure_indexes():
+    """
+    Creates indexes once per process, after boot rather than at import, so
+    starting never waits on MongoDB. The attempt runs on a background
+    thread, so no request waits on it either; while MongoDB is unreachable
+    it is retried at most every INDEX_RETRY_SECONDS. Static files and the
+    service worker never trigger it.
+    """
+    global _indexes_next_try
+    if _indexes_ready or request.endpoint in ("static", "service_worker"):
+        return
+    now = time.monotonic()
+    with _indexes_lock:
+        if _indexes_ready or now < _indexes_next_try:
+            return
+        _indexes_next_try = now + INDEX_RETRY_SECONDS
+    threading.Thread(target=_create_indexes, name="ensure-indexes", daemon=True).start()
+
+
+def create_app(config_object=Config):
+    app = Flask(__name__)
+    app.config.from_object(config_object)
+    login_manager.init_app(app)
+
+    # Blueprints are imported here so importing this module stays cheap
+    from routes.auth_routes import auth_bp
+    from routes.product_routes import product_bp
+    from routes.sale_routes import sale_bp
+    from routes.analytics_routes import analytics_bp
+    from routes.admin_routes import admin_bp
+
+    app.register_blueprint(auth_bp)
+    app.register_blueprint(product_bp)
+    app.register_blueprint(sale_bp)
+    app.register_blueprint(analytics_bp)
+    app.register_blueprint(admin_bp)
+
+    app.before_request(ensure_indexes)
+
+    @app.route("/")
+    def home():
+        if current_user.is_authenticated:
+            if current_user.role == "admin":
+                return redirect(url_for("admin.dashboard"))
+            return redirect(url_for("product.dashboard"))
+        return redirect(url_for("auth.login"))
+
+    @app.route("/service-worker.js")
+    def service_worker():
+        # Served from the root so the worker's scope covers every page
+        response = send_from_directory(os.path.join(app.static_folder, "js"), "service-worker.js",
+                                       mimetype="application/javascript")
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    return app
+
+
+# gunicorn app:app
+app = create_app()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,122 @@
+"""
+Benchmark: per-product profit loop vs. the vectorized batch metrics engine.
+
+    python benchmarks/bench_analytics.py                     # mongomock, 1k batches
+    python benchmarks/bench_analytics.py --uri mongodb://localhost:27017 --batches 10000
+
+The per-product loop mirrors Product.compute_profit (one find_one per batch);
+the engine computes profit, margin, sell-through, days-to-sell-out and
+revenue/day for every batch from two bulk queries. A scratch database is used
+and dropped afterwards.
+
+Only the --uri numbers say anything about database round trips. mongomock
+scans a collection on every find_one, so the loop there is quadratic in the
+batch count and its speedup measures the mock; the default is kept small.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.analytics import load_batches, compute_batch_metrics  # noqa: E402
+
+
+def get_client(uri):
+    if uri:
+        from pymongo import MongoClient
+        return MongoClient(uri)
+    import mongomock
+    return mongomock.MongoClient()
+
+
+def seed(db, batches, sales_per_batch):
+    now = datetime.utcnow()
+    products, sales = [], []
+    for i in range(batches):
+        created = now - timedelta(days=random.randint(1, 365))
+        sold = random.randint(0, 200)
+        price = random.choice([500.0, 1000.0, 1500.0, 2500.0])
+        products.append({
+            "name": f"Batch {i}",
+            "batch_cost": float(random.randint(50, 400) * 1000),
+            "stock_quantity": random.randint(0, 200),
+            "unit_price": price,
+            "status": random.choice(["active", "finished"]),
+            "created_at": created,
+            "total_quantity_sold": sold,
+            "total_amount_sold": sold * price
+        })
+    ids = db.products.insert_many(products).inserted_ids
+    for pid, p in zip(ids, products):
+        for _ in range(sales_per_batch):
+            sales.append({
+                "product_id": pid,
+                "quantity": 1,
+                "amount": p["unit_price"],
+                "date": p["created_at"] + timedelta(hours=random.randint(1, 24 * 30))
+            })
+    if sales:
+        db.sales.insert_many(sales)
+    return ids
+
+
+def per_product_loop(db, ids):
+    profits = []
+    for pid in ids:
+        product = db.products.find_one({"_id": pid})
+        profits.append(float(product.get("total_amount_sold", 0.0)) - float(product.get("batch_cost", 0.0)))
+    return profits
+
+
+def vectorized(db):
+    products, spans = load_batches(db)
+    return compute_batch_metrics(products, spans)
+
+
+def timed(fn, *args, repeat=3):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--uri", help="MongoDB URI (defaults to in-memory mongomock)")
+    parser.add_argument("--batches", type=int,
+                        help="batches to seed (default 10000 with --uri, 1000 on mongomock)")
+    parser.add_argument("--sales-per-batch", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    if args.batches is None:
+        args.batches = 10000 if args.uri else 1000
+
+    client = get_client(args.uri)
+    db = client["emekaokservice_bench"]
+    client.drop_database("emekaokservice_bench")
+    try:
+        ids = seed(db, args.batches, args.sales_per_batch)
+
+        loop_s, profits = timed(per_product_loop, db, ids, repeat=args.repeat)
+        vec_s, metrics = timed(vectorized, db, repeat=args.repeat)
+
+        assert abs(sum(profits) - float(metrics["profit"].sum())) < 1e-6 * max(1.0, abs(sum(profits)))
+
+        print(f"backend:            {'mongodb' if args.uri else 'mongomock (in-memory, not representative)'}")
+        print(f"batches:            {args.batches}")
+        print(f"per-product loop:   {loop_s * 1000:9.1f} ms  (profit only)")
+        print(f"vectorized engine:  {vec_s * 1000:9.1f} ms  (all metrics)")
+        print(f"speedup:            {loop_s / vec_s:9.1f}x")
+    finally:
+        client.drop_database("emekaokservice_bench")
+
+
+if __name__ == "__main__":
+    main()
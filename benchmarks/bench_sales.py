@@ -0,0 +1,127 @@
+"""
+Benchmark: sale write throughput, legacy route path vs. services.sale_service.
+
+    python benchmarks/bench_sales.py                     # mongomock
+    python benchmarks/bench_sales.py --uri mongodb://localhost:27017 --sales 5000 --threads 8
+
+The legacy path mirrors the old sale_routes.log_sale (find product, insert
+sale, $inc + $push counters); the service does one conditional pipeline
+update, one insert and one user-counter upsert. Round-trip savings only show
+against a real mongod. Afterwards the consistency checker must report no
+mismatches for the service run. mongomock updates are not atomic across
+threads, so it runs single-threaded. A scratch database is used and dropped.
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import db as db_module  # noqa: E402
+
+DB_NAME = "emekaokservice_bench"
+
+
+class BenchUser:
+    id = "bench-user"
+    username = "bench"
+
+
+def get_client(uri):
+    if uri:
+        from pymongo import MongoClient
+        return MongoClient(uri)
+    import mongomock
+    return mongomock.MongoClient()
+
+
+def seed_products(db, count):
+    return db.products.insert_many([
+        {
+            "name": f"Batch {i}",
+            "batch_cost": 100000.0,
+            "stock_quantity": 10 ** 9,
+            "unit_price": 1000.0,
+            "status": "active",
+            "created_at": datetime.utcnow(),
+            "total_quantity_sold": 0,
+            "total_amount_sold": 0.0
+        }
+        for i in range(count)
+    ]).inserted_ids
+
+
+def legacy_sale(db, product_id, quantity, amount):
+    product = db.products.find_one({"_id": product_id})
+    sale = {
+        "product_id": product_id,
+        "product_name": product.get("name", "Unknown"),
+        "quantity": quantity,
+        "amount": amount,
+        "unit_price": amount / quantity,
+        "user_id": BenchUser.id,
+        "username": BenchUser.username,
+        "date": datetime.utcnow()
+    }
+    db.sales.insert_one(sale)
+    db.products.update_one(
+        {"_id": product_id},
+        {
+            "$inc": {"total_quantity_sold": quantity, "total_amount_sold": amount, "stock_quantity": -quantity},
+            "$push": {"sales": {"quantity": quantity, "amount": amount, "date": sale["date"]}}
+        }
+    )
+
+
+def run(fn, ids, sales, threads):
+    jobs = [(ids[i % len(ids)], 1 + i % 3, 1000.0 * (1 + i % 3)) for i in range(sales)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda job: fn(*job), jobs))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--uri", help="MongoDB URI (defaults to in-memory mongomock)")
+    parser.add_argument("--products", type=int, default=15)
+    parser.add_argument("--sales", type=int, default=2000)
+    parser.add_argument("--threads", type=int, help="default: 4 with --uri, 1 on mongomock")
+    args = parser.parse_args()
+    args.threads = args.threads or (4 if args.uri else 1)
+
+    client = get_client(args.uri)
+    client.drop_database(DB_NAME)
+    db = client[DB_NAME]
+    db_module.set_db(db)
+    from services import sale_service
+
+    try:
+        ids = seed_products(db, args.products)
+        legacy_s = run(lambda pid, q, a: legacy_sale(db, pid, q, a), ids, args.sales, args.threads)
+
+        db.products.drop()
+        db.sales.drop()
+        db.user_daily_sales.drop()
+        ids = seed_products(db, args.products)
+        service_s = run(
+            lambda pid, q, a: sale_service.record_sale(pid, q, amount=a, user=BenchUser),
+            ids, args.sales, args.threads
+        )
+        mismatches = sale_service.find_inconsistencies()
+
+        print(f"sales:            {args.sales} over {args.threads} threads")
+        print(f"legacy path:      {args.sales / legacy_s:9.0f} sales/s")
+        print(f"sale service:     {args.sales / service_s:9.0f} sales/s")
+        print(f"mismatches:       {len(mismatches)}")
+        if mismatches:
+            sys.exit(1)
+    finally:
+        client.drop_database(DB_NAME)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Startup benchmark: how long `import app` takes, per module, via -X importtime.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 800 --top 15
+
+MONGO_URI points at an unreachable host, so any database work at import
+shows up as a timeout. Exits with status 1 when the import exceeds the
+budget or pulls in a module that must stay deferred (pymongo, numpy).
+Run it before deploying changes to app.py, config.py or any route module.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFERRED = ("pymongo", "numpy")
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_app(uri):
+    env = dict(os.environ, MONGO_URI=uri, MONGO_TIMEOUT_MS="30000")
+    code = "import sys, app; print(','.join(m for m in %r if m in sys.modules))" % (DEFERRED,)
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, env=env, capture_output=True, text=True, timeout=120
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        sys.exit(f"import app failed:\n{proc.stderr[-2000:]}")
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return wall_ms, proc.stderr, loaded
+
+
+def parse(stderr):
+    rows = []
+    for line in stderr.splitlines():
+        m = LINE.match(line)
+        if m:
+            depth = len(m.group(3)) // 2
+            rows.append((m.group(4), int(m.group(1)) / 1000, int(m.group(2)) / 1000, depth))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("STARTUP_BUDGET_MS", 1000)),
+                        help="max cumulative import time of `app` (default 1000, or STARTUP_BUDGET_MS)")
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--uri", default="mongodb://unreachable.invalid:27017",
+                        help="MongoDB URI seen by the app during import")
+    args = parser.parse_args()
+
+    wall_ms, stderr, loaded = import_app(args.uri)
+    rows = parse(stderr)
+    app_ms = next((cum for name, _, cum, depth in rows if name == "app" and depth == 0), wall_ms)
+
+    print(f"import app:   {app_ms:8.1f} ms  (process wall time {wall_ms:.0f} ms, budget {args.budget_ms:.0f} ms)")
+    print(f"top {args.top} modules by cumulative import time:")
+    for name, self_ms, cum_ms, _ in sorted(rows, key=lambda r: -r[2])[1:args.top + 1]:
+        print(f"  {cum_ms:8.1f} ms  (self {self_ms:6.1f})  {name}")
+
+    failures = []
+    if app_ms > args.budget_ms:
+        failures.append(f"import app took {app_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    if loaded:
+        failures.append(f"deferred modules imported at boot: {', '.join(loaded)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Load test: throughput and tail latency of the app under each gunicorn profile.
+
+    python benchmarks/load_test.py                              # mongomock-backed app
+    python benchmarks/load_test.py --profiles sync,gthread --concurrency 32 --duration 20
+    python benchmarks/load_test.py --app app:app                # real MONGO_URI
+
+For every profile a gunicorn server is started with gunicorn.conf.py, each
+client logs in as the admin and then loops over a request mix for the given
+duration. One request in --slow-every goes to --slow-path (the analytics page
+by default) to show how a heavy request affects everyone else.
+
+Each row reports the worker class gunicorn actually ran. A profile whose
+worker class isn't installed here (gevent without the gevent package) is
+skipped rather than silently measured as gthread.
+"""
+import argparse
+import http.cookiejar
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADMIN = ("loadtest-admin", "loadtest-password")
+PATHS = ["/products/dashboard", "/admin/dashboard", "/admin/leaderboard?period=week", "/sales/quick-sale"]
+
+
+def start_server(profile, app, port, workers):
+    env = dict(
+        os.environ,
+        GUNICORN_PROFILE=profile,
+        PORT=str(port),
+        ADMIN_USERNAME=ADMIN[0],
+        ADMIN_PASSWORD=ADMIN[1],
+        GUNICORN_MAX_REQUESTS="0",
+    )
+    env.setdefault("MONGO_URI", "mongodb://unreachable.invalid:27017")
+    if workers:
+        env["WEB_CONCURRENCY"] = str(workers)
+    # The error log goes to a file: an undrained pipe would stall the server
+    log = tempfile.TemporaryFile(mode="w+")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", app],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=log, text=True
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            log.seek(0)
+            sys.exit(f"gunicorn ({profile}) exited:\n{log.read()[-2000:]}")
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/auth/login", timeout=2)
+            log.seek(0)
+            match = re.search(r"worker_class=(\w+)", log.read())
+            return proc, match.group(1) if match else "?"
+        except OSError:
+            time.sleep(0.5)
+    proc.terminate()
+    sys.exit(f"gunicorn ({profile}) did not come up")
+
+
+def available(profile):
+    if profile != "gevent":
+        return True
+    try:
+        import gevent  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def logged_in_opener(base):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    data = urllib.parse.urlencode({"username": ADMIN[0], "password": ADMIN[1]}).encode()
+    opener.open(f"{base}/auth/login", data=data, timeout=30).read()
+    return opener
+
+
+def client(base, stop_at, slow_path, slow_every, results, lock):
+    opener = logged_in_opener(base)
+    latencies, errors, i = [], 0, 0
+    while time.time() < stop_at:
+        path = slow_path if slow_every and i % slow_every == slow_every - 1 else PATHS[i % len(PATHS)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            opener.open(base + path, timeout=60).read()
+            latencies.append(time.perf_counter() - start)
+        except OSError:
+            errors += 1
+    with lock:
+        results["latencies"].extend(latencies)
+        results["errors"] += errors
+
+
+def percentile(values, pct):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))]
+
+
+def run_profile(profile, args):
+    base = f"http://127.0.0.1:{args.port}"
+    proc, worker_class = start_server(profile, args.app, args.port, args.workers)
+    try:
+        results, lock = {"latencies": [], "errors": 0}, threading.Lock()
+        stop_at = time.time() + args.duration
+        threads = [
+            threading.Thread(target=client, args=(base, stop_at, args.slow_path, args.slow_every, results, lock))
+            for _ in range(args.concurrency)
+        ]
+        started = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        proc.terminate()
+        proc.wait(timeout=30)
+
+    lat = results["latencies"]
+    return {
+        "profile": profile,
+        "worker_class": worker_class,
+        "requests": len(lat),
+        "rps": len(lat) / elapsed,
+        "p50": percentile(lat, 50) * 1000,
+        "p95": percentile(lat, 95) * 1000,
+        "p99": percentile(lat, 99) * 1000,
+        "errors": results["errors"]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profiles", default="sync,gthread,gevent")
+    parser.add_argument("--app", default="benchmarks.mock_wsgi:app")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, help="override WEB_CONCURRENCY for every profile")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--slow-path", default="/analytics/")
+    parser.add_argument("--slow-every", type=int, default=20, help="0 disables the slow request")
+    args = parser.parse_args()
+
+    rows = []
+    for profile in (p.strip() for p in args.profiles.split(",") if p.strip()):
+        if not available(profile):
+            print(f"skipping {profile}: its worker class is not installed (pip install {profile})")
+            continue
+        rows.append(run_profile(profile, args))
+
+    print(f"{'profile':<10}{'class':>10}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for r in rows:
+        print(f"{r['profile']:<10}{r['worker_class']:>10}{r['requests']:>10}{r['rps']:>10.1f}{r['p50']:>10.1f}"
+              f"{r['p95']:>10.1f}{r['p99']:>10.1f}{r['errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+WSGI entry point backed by an in-memory, pre-seeded mongomock database, so
+benchmarks/load_test.py can exercise the real routes without a MongoDB.
+
+    gunicorn -c gunicorn.conf.py benchmarks.mock_wsgi:app
+"""
+import os
+import random
+from datetime import datetime, timedelta
+
+import mongomock
+
+from utils import db as db_module
+
+db_module.set_db(mongomock.MongoClient()["emekaokservice_loadtest"])
+
+from app import app  # noqa: E402
+from models.product_model import Product  # noqa: E402
+from services import sale_service  # noqa: E402
+
+
+class _Seller:
+    def __init__(self, n):
+        self.id = f"seller-{n}"
+        self.username = f"seller{n}"
+
+
+def _seed(products=15, sales=int(os.getenv("LOADTEST_SALES", 3000))):
+    rng = random.Random(42)
+    ids = [Product.create(f"Batch {i}", 50000 + 1000 * i, 10 ** 6, 500 + 50 * i) for i in range(products)]
+    sellers = [_Seller(n) for n in range(5)]
+    now = datetime.utcnow()
+    for _ in range(sales):
+        sale_service.record_sale(
+            rng.choice(ids), rng.randint(1, 5),
+            user=rng.choice(sellers),
+            when=now - timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+        )
+
+
+_seed()
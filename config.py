@@ -1,14 +1,34 @@
 import os
-from dotenv import load_dotenv
 
-load_dotenv()
+
+def load_env():
+    """
+    Loads .env next to this file, if there is one. python-dotenv is only
+    imported when the file exists; variables already set in the environment win.
+    """
+    env_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".env")
+    if os.path.exists(env_file):
+        from dotenv import load_dotenv
+        load_dotenv(env_file)
+
+
+load_env()
 
 class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "fallbacksecret")
     MONGO_URI = os.getenv("MONGO_URI")
+    MONGO_DB_NAME = os.getenv("MONGO_DB_NAME", "emekaokservice")
+    MONGO_TIMEOUT_MS = int(os.getenv("MONGO_TIMEOUT_MS", 5000))
     APP_PASSWORD = os.getenv("APP_PASSWORD", "emekaok123")
     ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
     ADMIN_USERNAME = os.getenv("ADMIN_USERNAME")
     SESSION_PERMANENT = True
     SESSION_TYPE = "filesystem"
     PERMANENT_SESSION_LIFETIME = 60 * 60 * 24 * 30  # 30 days
+    VELOCITY_HALF_LIFE_DAYS = float(os.getenv("VELOCITY_HALF_LIFE_DAYS", 7))
+    LOW_STOCK_DAYS = float(os.getenv("LOW_STOCK_DAYS", 3))
+    JOBS_DIR = os.getenv("JOBS_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "jobs"))
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", 2))
+    ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 180))
+    # Offline sales claiming to be older than this came from a wrong clock
+    OFFLINE_SALE_MAX_AGE_DAYS = int(os.getenv("OFFLINE_SALE_MAX_AGE_DAYS", 30))
@@ -0,0 +1,138 @@
+# gunicorn.conf.py
+"""
+Production gunicorn settings.
+
+    gunicorn -c gunicorn.conf.py app:app
+
+GUNICORN_PROFILE picks the worker model:
+- gthread (default): a few processes, each with a thread pool. A slow
+  request only ties up one thread, and threads share the MongoClient pool.
+- gevent: cooperative greenlets, for many mostly-idle connections. Needs the
+  gevent package (not in requirements.txt); falls back to gthread with a
+  warning when it isn't installed. Each worker loads the app itself.
+- sync: one request per process, gunicorn's default. Kept for comparison.
+
+Worker and thread counts derive from the CPUs and memory available to the
+container (cgroup limits, then CPU affinity, then the host);
+WEB_CONCURRENCY and GUNICORN_THREADS override them.
+"""
+import math
+import os
+
+
+def _cpus():
+    # Host CPUs this process may run on, capped by a cgroup v2/v1 CPU quota
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    for path, period_path in (("/sys/fs/cgroup/cpu.max", None),
+                              ("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us")):
+        try:
+            with open(path) as f:
+                fields = f.read().split()
+            if period_path:
+                with open(period_path) as f:
+                    fields.append(f.read().strip())
+            quota, period = fields[0], fields[1]
+            if quota not in ("max", "-1") and int(period) > 0:
+                return max(1, min(cpus, math.ceil(int(quota) / int(period))))
+        except (OSError, ValueError, IndexError):
+            pass
+    return cpus
+
+
+def _memory_mb():
+    # cgroup v2, then v1 (container limits), then the host's physical memory
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            if value != "max" and int(value) < 1 << 50:
+                return int(value) // (1024 * 1024)
+        except (OSError, ValueError):
+            pass
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+    except (ValueError, OSError, AttributeError):
+        return 512
+
+
+def _worker_class(profile):
+    if profile == "gevent":
+        try:
+            import gevent  # noqa: F401
+            return "gevent"
+        except ImportError:
+            return "gthread"
+    return profile if profile in ("gthread", "sync") else "gthread"
+
+
+profile = os.getenv("GUNICORN_PROFILE", "gthread")
+worker_class = _worker_class(profile)
+
+cpus = _cpus()
+memory_mb = _memory_mb()
+# Resident size of one worker with the app, pymongo and numpy loaded
+worker_memory_mb = int(os.getenv("GUNICORN_WORKER_MEMORY_MB", 120))
+# Leave room for the master process and the OS
+max_by_memory = max(1, (memory_mb - 100) // worker_memory_mb)
+
+if worker_class == "sync":
+    default_workers = 2 * cpus + 1
+elif worker_class == "gthread":
+    default_workers = cpus + 1
+else:
+    default_workers = cpus
+
+workers = int(os.getenv("WEB_CONCURRENCY", min(default_workers, max_by_memory)))
+threads = int(os.getenv("GUNICORN_THREADS", 4 if worker_class == "gthread" else 1))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 200))
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+# Load the app once in the master so workers fork with it already imported.
+# Not under gevent: its worker monkey-patches only after the fork, so locks
+# the app created in the master would stay native and block the whole
+# worker when a greenlet waits on one
+preload_app = worker_class != "gevent"
+
+# Heavy admin work runs on the job runner, so requests should be short
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+graceful_timeout = 30
+keepalive = 5
+
+# Recycle workers periodically to cap memory growth; jitter avoids all
+# workers restarting at once. Workers running background jobs are kept
+# until the jobs finish (see pre_request)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 1000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 100))
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_fork(server, worker):
+    # MongoClient is not fork-safe: give each worker its own connection pool
+    from utils.db import reset_client
+    reset_client()
+
+
+def pre_request(worker, req):
+    worker.log.debug("%s %s", req.method, req.path)
+    # Recycling now would kill this worker's background jobs mid-run:
+    # push its request limit back until they are done
+    if worker.nr + 1 >= worker.max_requests:
+        from services import jobs
+        if jobs.active_count():
+            worker.max_requests = worker.nr + 50
+
+
+def when_ready(server):
+    if worker_class != profile:
+        server.log.warning("GUNICORN_PROFILE=%s is not available here; running %s workers instead",
+                           profile, worker_class)
+    server.log.info(
+        "profile=%s worker_class=%s workers=%s threads=%s preload=%s (cpus=%s, memory=%sMB)",
+        profile, worker_class, workers, threads, preload_app, cpus, memory_mb
+    )
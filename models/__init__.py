@@ -1,3 +1,5 @@
 from .user_model import User
 from .product_model import Product
 from .sale_model import Sale
+from .user_stats_model import UserStats
+from .forecast_model import Forecast
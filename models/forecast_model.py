@@ -0,0 +1,184 @@
+# models/forecast_model.py
+import math
+from datetime import datetime
+from bson import ObjectId
+from config import Config
+from utils.db import get_db
+
+db = get_db()
+
+MS_PER_DAY = 86400000.0
+
+
+def _tau_days():
+    # Time constant of the exponential decay, from the configured half-life
+    return float(Config.VELOCITY_HALF_LIFE_DAYS) / math.log(2)
+
+
+def velocity_update(quantity, when):
+    """
+    Aggregation-pipeline $set that folds one sale into the product's
+    exponentially-weighted sales velocity (units/day). A sale newer than
+    velocity_at decays the old value up to the sale:
+        v = v_prev * exp(-dt / tau) + quantity / tau,  velocity_at = when
+    an older one (synced late from offline) is decayed up to velocity_at:
+        v = v_prev + quantity / tau * exp(-dt / tau),  velocity_at unchanged
+    so the exponent is never positive, however old the sale.
+    Usable on its own or merged into a larger pipeline update.
+    """
+    tau = _tau_days()
+    at = {"$ifNull": ["$velocity_at", when]}
+    return {
+        "velocity": {"$cond": [
+            {"$gte": [when, at]},
+            {"$add": [
+                {"$multiply": [
+                    {"$ifNull": ["$velocity", 0]},
+                    {"$exp": {"$divide": [{"$subtract": [when, at]}, -tau * MS_PER_DAY]}}
+                ]},
+                int(quantity) / tau
+            ]},
+            {"$add": [
+                {"$ifNull": ["$velocity", 0]},
+                {"$multiply": [
+                    int(quantity) / tau,
+                    {"$exp": {"$divide": [{"$subtract": [at, when]}, -tau * MS_PER_DAY]}}
+                ]}
+            ]}
+        ]},
+        "velocity_at": {"$max": [when, at]}
+    }
+
+
+def velocity_revert(quantity, when):
+    """
+    Pipeline $set that takes one sale recorded by velocity_update back out
+    of the velocity: its contribution, decayed to the product's current
+    velocity_at, is subtracted. Sales folded in since are left alone.
+    """
+    tau = _tau_days()
+    return {
+        "velocity": {"$max": [0, {"$subtract": [
+            {"$ifNull": ["$velocity", 0]},
+            {"$multiply": [
+                int(quantity) / tau,
+                {"$exp": {"$divide": [
+                    {"$subtract": [{"$ifNull": ["$velocity_at", when]}, when]},
+                    -tau * MS_PER_DAY
+                ]}}
+            ]}
+        ]}]}
+    }
+
+
+class Forecast:
+    """
+    Sales velocity and stock-out forecasting.
+    Velocity is folded in by services.sale_service on each sale write
+    (see velocity_update), so forecasts never rescan the sales collection.
+    """
+
+    @staticmethod
+    def current_velocity(product, now=None):
+        """
+        Velocity decayed to `now`, in units/day.
+        """
+        velocity = float(product.get("velocity", 0) or 0)
+        since = product.get("velocity_at")
+        if not velocity or not since:
+            return 0.0
+        now = now or datetime.utcnow()
+        elapsed = max((now - since).total_seconds() / 86400.0, 0.0)
+        return velocity * math.exp(-elapsed / _tau_days())
+
+    @staticmethod
+    def days_until_stockout(product, now=None):
+        """
+        Estimated days until the batch runs out; None when it isn't selling.
+        """
+        stock = int(product.get("stock_quantity", 0) or 0)
+        if stock <= 0:
+            return 0.0
+        velocity = Forecast.current_velocity(product, now)
+        if velocity <= 0:
+            return None
+        return stock / velocity
+
+    @staticmethod
+    def low_stock_alerts(threshold_days=None, now=None):
+        """
+        Active batches that are out of stock or forecast to run out within
+        `threshold_days`, soonest first.
+        """
+        threshold = float(threshold_days if threshold_days is not None else Config.LOW_STOCK_DAYS)
+        now = now or datetime.utcnow()
+        products = db.products.find(
+            {"status": "active"},
+            {"name": 1, "stock_quantity": 1, "velocity": 1, "velocity_at": 1}
+        )
+        alerts = []
+        for p in products:
+            days = Forecast.days_until_stockout(p, now)
+            if days is None or days > threshold:
+                continue
+            alerts.append({
+                "_id": p["_id"],
+                "name": p.get("name", ""),
+                "stock_quantity": int(p.get("stock_quantity", 0) or 0),
+                "velocity": Forecast.current_velocity(p, now),
+                "days_left": days
+            })
+        return sorted(alerts, key=lambda a: a["days_left"])
+
+    @staticmethod
+    def _ledger_velocity(product_id, now):
+        tau = _tau_days()
+        velocity = 0.0
+        # Older quick sales stored product_id as a string
+        for sale in db.sales.find({"product_id": {"$in": [product_id, str(product_id)]}},
+                                  {"quantity": 1, "date": 1}):
+            age = max((now - sale["date"]).total_seconds() / 86400.0, 0.0)
+            velocity += sale["quantity"] / tau * math.exp(-age / tau)
+        return velocity
+
+    @staticmethod
+    def rebuild(now=None):
+        """
+        Recomputes every product's velocity from the sales ledger, and resets
+        it to 0 on products with no sales. Only needed once for sales logged
+        before velocity tracking existed.
+
+        Each product is written only if its velocity_at is still the one read
+        before the ledger scan; a product that sold meanwhile is rescanned on
+        its own instead of having that sale overwritten.
+        """
+        now = now or datetime.utcnow()
+        tau = _tau_days()
+        snapshot = list(db.products.find({}, {"velocity": 1, "velocity_at": 1}))
+
+        velocities = {}
+        for s in db.sales.find({}, {"product_id": 1, "quantity": 1, "date": 1}):
+            age = max((now - s["date"]).total_seconds() / 86400.0, 0.0)
+            key = str(s["product_id"])
+            velocities[key] = velocities.get(key, 0.0) + s["quantity"] / tau * math.exp(-age / tau)
+
+        updated = 0
+        for product in snapshot:
+            velocity = velocities.get(str(product["_id"]), 0.0)
+            if not velocity and not product.get("velocity"):
+                continue
+            at = now
+            for _ in range(5):
+                result = db.products.update_one(
+                    {"_id": product["_id"], "velocity_at": product.get("velocity_at")},
+                    {"$set": {"velocity": velocity, "velocity_at": at}}
+                )
+                if result.matched_count:
+                    updated += 1
+                    break
+                product = db.products.find_one({"_id": product["_id"]}, {"velocity_at": 1})
+                if product is None:
+                    break
+                at = max(now, product.get("velocity_at") or now)
+                velocity = Forecast._ledger_velocity(product["_id"], at)
+        return updated
@@ -2,6 +2,7 @@
 from datetime import datetime
 from bson import ObjectId
 from utils.db import get_db
+from services import sale_service
 
 db = get_db()
 
@@ -9,7 +10,7 @@ class Product:
     """
     Product model with sales-friendly helpers:
     - Create products with stock and price
-    - Record sales (updates totals and stock)
+    - Record sales (via services.sale_service)
     - Restock and reprice
     - Calculate profit
     """
@@ -24,8 +25,7 @@ class Product:
             "status": status,
             "created_at": datetime.utcnow(),
             "total_quantity_sold": 0,
-            "total_amount_sold": 0.0,
-            "sales": []  # [{quantity, amount, date}]
+            "total_amount_sold": 0.0
         }
         result = db.products.insert_one(doc)
         return result.inserted_id
@@ -50,7 +50,7 @@ class Product:
     def mark_finished(product_id):
         return db.products.update_one(
             {"_id": ObjectId(product_id)},
-            {"$set": {"status": "finished"}}
+            {"$set": {"status": "finished", "finished_at": datetime.utcnow()}}
         )
 
     @staticmethod
@@ -74,43 +74,13 @@ class Product:
     @staticmethod
     def record_sale(product_id, quantity, unit_price=None):
         """
-        Records a sale:
+        Records a sale through the shared sale service:
         - Uses current unit_price unless overridden
-        - Decreases stock
-        - Increments totals
-        - Appends to sales history
+        - Rejects the sale if stock is insufficient
+        - Decreases stock, increments totals and logs it in the ledger
         """
-        product = db.products.find_one({"_id": ObjectId(product_id)})
-        if not product:
-            raise ValueError("Product not found")
-
-        qty = int(quantity)
-        if qty <= 0:
-            raise ValueError("Quantity must be positive")
-
-        # Use provided price or stored unit price
-        price = float(unit_price) if unit_price is not None else float(product.get("unit_price", 0.0))
-        if price <= 0:
-            raise ValueError("Unit price must be positive")
-
-        current_stock = int(product.get("stock_quantity", 0))
-        if current_stock < qty:
-            raise ValueError("Insufficient stock")
-
-        amount = qty * price
-        sale = {"quantity": qty, "amount": amount, "date": datetime.utcnow()}
-
-        return db.products.update_one(
-            {"_id": ObjectId(product_id)},
-            {
-                "$inc": {
-                    "stock_quantity": -qty,
-                    "total_quantity_sold": qty,
-                    "total_amount_sold": amount
-                },
-                "$push": {"sales": sale}
-            }
-        )
+        return sale_service.record_sale(product_id, quantity, unit_price=unit_price,
+                                        enforce_stock=True)
 
     @staticmethod
     def update(product_id, **fields):
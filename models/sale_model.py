@@ -2,6 +2,7 @@
 from datetime import datetime
 from bson import ObjectId
 from utils.db import get_db
+from services import sale_service
 
 db = get_db()
 
@@ -12,49 +13,12 @@ class Sale:
     """
 
     @staticmethod
-    def log_sale(product_id, quantity, unit_price=None):
+    def log_sale(product_id, quantity, unit_price=None, user=None):
         """
         Logs a sale and returns the inserted sale document.
         If unit_price is not provided, it uses the product's current price.
         """
-        product = db.products.find_one({"_id": ObjectId(product_id)})
-        if not product:
-            raise ValueError("Product not found")
-
-        qty = int(quantity)
-        if qty <= 0:
-            raise ValueError("Quantity must be positive")
-
-        price = float(unit_price) if unit_price is not None else float(product.get("unit_price", 0.0))
-        if price <= 0:
-            raise ValueError("Unit price must be positive")
-
-        amount = qty * price
-        sale = {
-            "product_id": ObjectId(product_id),
-            "product_name": product.get("name", "Unknown"),
-            "quantity": qty,
-            "unit_price": price,
-            "amount": amount,
-            "date": datetime.utcnow()
-        }
-
-        db.sales.insert_one(sale)
-
-        # Update product totals and stock
-        db.products.update_one(
-            {"_id": ObjectId(product_id)},
-            {
-                "$inc": {
-                    "total_quantity_sold": qty,
-                    "total_amount_sold": amount,
-                    "stock_quantity": -qty
-                },
-                "$push": {"sales": {"quantity": qty, "amount": amount, "date": sale["date"]}}
-            }
-        )
-
-        return sale
+        return sale_service.record_sale(product_id, quantity, unit_price=unit_price, user=user)
 
     @staticmethod
     def get_totals_by_product(product_id):
@@ -108,23 +72,6 @@ class Sale:
     @staticmethod
     def delete_sale(sale_id):
         """
-        Deletes a sale by ID and optionally adjusts product totals.
+        Deletes a sale by ID and reverses its product and user totals.
         """
-        sale = db.sales.find_one({"_id": ObjectId(sale_id)})
-        if not sale:
-            return False
-
-        db.sales.delete_one({"_id": ObjectId(sale_id)})
-
-        # Optional: reverse product totals
-        db.products.update_one(
-            {"_id": sale["product_id"]},
-            {
-                "$inc": {
-                    "total_quantity_sold": -sale["quantity"],
-                    "total_amount_sold": -sale["amount"],
-                    "stock_quantity": sale["quantity"]
-                }
-            }
-        )
-        return True
+        return sale_service.void_sale(sale_id) is not None
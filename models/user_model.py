@@ -2,6 +2,7 @@
 from flask_login import UserMixin
 from bson import ObjectId, errors
 from werkzeug.security import generate_password_hash, check_password_hash
+from datetime import datetime
 from utils.db import get_db
 
 db = get_db()
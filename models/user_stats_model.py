@@ -0,0 +1,189 @@
+# models/user_stats_model.py
+from datetime import datetime, timedelta
+from utils.db import get_db, driver
+from services.archive import aggregate_all
+
+db = get_db()
+
+PERIOD_DAYS = {"day": 1, "week": 7, "month": 30}
+
+
+class UserStats:
+    """
+    Per-user daily sales counters, kept up to date on every sale write.
+    One document per (user_id, day) so staff reports never touch the sales ledger:
+    {user_id, day: "YYYY-MM-DD", username, quantity, amount, sales_count}
+    """
+
+    @staticmethod
+    def ensure_indexes():
+        from pymongo import ASCENDING, DESCENDING
+
+        db.user_daily_sales.create_index(
+            [("user_id", ASCENDING), ("day", ASCENDING)], unique=True
+        )
+        db.user_daily_sales.create_index([("day", ASCENDING)])
+        # Recent-sales lookups on the staff dashboard
+        db.sales.create_index([("user_id", ASCENDING), ("date", DESCENDING)])
+
+    @staticmethod
+    def day_key(when=None):
+        return (when or datetime.utcnow()).strftime("%Y-%m-%d")
+
+    @staticmethod
+    def record(user_id, username, quantity, amount, when=None):
+        """
+        Adds one sale to the user's counter for the day it happened.
+        """
+        if not user_id:
+            return None
+        return db.user_daily_sales.update_one(
+            {"user_id": str(user_id), "day": UserStats.day_key(when)},
+            {
+                "$inc": {
+                    "quantity": int(quantity),
+                    "amount": float(amount),
+                    "sales_count": 1
+                },
+                "$set": {"username": username}
+            },
+            upsert=True
+        )
+
+    @staticmethod
+    def get_for_day(user_id, when=None):
+        doc = db.user_daily_sales.find_one(
+            {"user_id": str(user_id), "day": UserStats.day_key(when)}
+        )
+        return doc or {"quantity": 0, "amount": 0.0, "sales_count": 0}
+
+    @staticmethod
+    def leaderboard(period="day", limit=20):
+        """
+        Ranks staff by revenue for the last day, week (7 days) or month (30 days).
+        Scans at most users x days counter documents, whatever the ledger size.
+        """
+        if period not in PERIOD_DAYS:
+            raise ValueError("Period must be one of: day, week, month")
+
+        start = datetime.utcnow() - timedelta(days=PERIOD_DAYS[period] - 1)
+        pipeline = [
+            {"$match": {"day": {"$gte": UserStats.day_key(start)}}},
+            {"$group": {
+                "_id": "$user_id",
+                "username": {"$last": "$username"},
+                "quantity": {"$sum": "$quantity"},
+                "amount": {"$sum": "$amount"},
+                "sales_count": {"$sum": "$sales_count"}
+            }},
+            {"$sort": {"amount": -1, "quantity": -1}},
+            {"$limit": int(limit)}
+        ]
+        return list(db.user_daily_sales.aggregate(pipeline))
+
+    @staticmethod
+    def _ledger_totals(user_id, day):
+        start = datetime.strptime(day, "%Y-%m-%d")
+        pipeline = [
+            {"$match": {"user_id": user_id, "date": {"$gte": start, "$lt": start + timedelta(days=1)}}},
+            {"$group": {
+                "_id": None,
+                "username": {"$last": "$username"},
+                "quantity": {"$sum": "$quantity"},
+                "amount": {"$sum": "$amount"},
+                "sales_count": {"$sum": 1}
+            }}
+        ]
+        totals = {"user_id": user_id, "day": day, "username": None,
+                  "quantity": 0, "amount": 0.0, "sales_count": 0}
+        for r in aggregate_all("sales", pipeline):
+            totals["username"] = r.get("username") or totals["username"]
+            totals["quantity"] += r["quantity"]
+            totals["amount"] += r["amount"]
+            totals["sales_count"] += r["sales_count"]
+        return totals
+
+    @staticmethod
+    def _swap(current, target):
+        """
+        Replaces the counter `current` (as last read, or None) with `target`,
+        only if no sale has bumped it since. Returns False on a lost race.
+        """
+        if current is None:
+            if not target["sales_count"]:
+                return True
+            try:
+                db.user_daily_sales.insert_one(dict(target))
+            except driver().errors.DuplicateKeyError:
+                return False
+            return True
+
+        unchanged = {
+            "_id": current["_id"],
+            "quantity": current.get("quantity"),
+            "amount": current.get("amount"),
+            "sales_count": current.get("sales_count")
+        }
+        if not target["sales_count"]:
+            return db.user_daily_sales.delete_one(unchanged).deleted_count == 1
+        fields = {k: target[k] for k in ("username", "quantity", "amount", "sales_count")}
+        if fields["username"] is None:
+            fields.pop("username")
+        return db.user_daily_sales.update_one(unchanged, {"$set": fields}).matched_count == 1
+
+    @staticmethod
+    def rebuild():
+        """
+        Recomputes every counter from the sales ledger, archive included.
+        Only needed once for sales logged before counters existed.
+
+        Safe while sales are being recorded: counters are corrected one at a
+        time and never emptied, and a counter bumped during the rebuild is
+        recomputed from the ledger again instead of being overwritten.
+        """
+        snapshot = {(d["user_id"], d["day"]): d for d in db.user_daily_sales.find({})}
+
+        pipeline = [
+            {"$match": {"user_id": {"$exists": True}}},
+            {"$group": {
+                "_id": {
+                    "user_id": "$user_id",
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}}
+                },
+                "username": {"$last": "$username"},
+                "quantity": {"$sum": "$quantity"},
+                "amount": {"$sum": "$amount"},
+                "sales_count": {"$sum": 1}
+            }}
+        ]
+        counters = {}
+        for r in aggregate_all("sales", pipeline):
+            key = (r["_id"]["user_id"], r["_id"]["day"])
+            doc = counters.setdefault(key, {
+                "user_id": key[0],
+                "day": key[1],
+                "username": r.get("username"),
+                "quantity": 0,
+                "amount": 0.0,
+                "sales_count": 0
+            })
+            doc["quantity"] += r["quantity"]
+            doc["amount"] += r["amount"]
+            doc["sales_count"] += r["sales_count"]
+
+        for key in set(counters) | set(snapshot):
+            current = snapshot.get(key)
+            target = counters.get(key) or {"user_id": key[0], "day": key[1], "username": None,
+                                           "quantity": 0, "amount": 0.0, "sales_count": 0}
+            if current is not None and current.get("quantity") == target["quantity"] \
+                    and current.get("sales_count") == target["sales_count"] \
+                    and abs((current.get("amount") or 0) - target["amount"]) < 0.005:
+                continue
+            if UserStats._swap(current, target):
+                continue
+            # A sale landed on this counter meanwhile: re-read both sides
+            for _ in range(5):
+                current = db.user_daily_sales.find_one({"user_id": key[0], "day": key[1]})
+                if UserStats._swap(current, UserStats._ledger_totals(*key)):
+                    break
+        return len(counters)
@@ -1,10 +1,14 @@
 # routes/admin_routes.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file
+from flask import Blueprint, render_template, request, redirect, url_for, flash, send_file, jsonify
 from flask_login import login_required, current_user
 from utils.db import get_db
+from models.user_stats_model import UserStats, PERIOD_DAYS
+from models.forecast_model import Forecast
+from services import jobs, admin_tasks  # admin_tasks registers the job functions
+from services.archive import archived_totals
 from bson import ObjectId
 from datetime import datetime
-import io, csv
+import json
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 db = get_db()
@@ -18,18 +22,57 @@ def admin_only():
 def dashboard():
     if admin_only(): return admin_only()
 
-    products = list(db.products.find({}))
-    total_revenue = sum(p.get("total_amount_sold", 0) for p in products)
-    total_cost = sum(p.get("batch_cost", 0) for p in products)
+    # Hot batches plus the running totals of archived ones
+    products = list(db.products.find({}, {"total_amount_sold": 1, "batch_cost": 1, "total_quantity_sold": 1}))
+    archived = archived_totals()
+    total_revenue = sum(p.get("total_amount_sold", 0) for p in products) + archived["total_amount_sold"]
+    total_cost = sum(p.get("batch_cost", 0) for p in products) + archived["batch_cost"]
     total_profit = total_revenue - total_cost
-    total_quantity = sum(p.get("total_quantity_sold", 0) for p in products)
+    total_quantity = sum(p.get("total_quantity_sold", 0) for p in products) + archived["total_quantity_sold"]
     user_count = db.users.count_documents({"role": {"$ne": "admin"}})
 
     return render_template("admin/dashboard.html",
                            total_revenue=total_revenue,
                            total_profit=total_profit,
                            total_quantity=total_quantity,
-                           user_count=user_count)
+                           user_count=user_count,
+                           low_stock=Forecast.low_stock_alerts())
+
+@admin_bp.route("/leaderboard")
+@login_required
+def leaderboard():
+    if admin_only(): return admin_only()
+
+    period = request.args.get("period", "day")
+    if period not in PERIOD_DAYS:
+        period = "day"
+    rows = UserStats.leaderboard(period)
+    return render_template("admin/leaderboard.html", rows=rows, period=period)
+
+@admin_bp.route("/api/leaderboard")
+@login_required
+def leaderboard_api():
+    if admin_only(): return admin_only()
+
+    period = request.args.get("period", "day")
+    try:
+        rows = UserStats.leaderboard(period)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "period": period,
+        "leaderboard": [
+            {
+                "rank": i + 1,
+                "user_id": r["_id"],
+                "username": r.get("username"),
+                "quantity": r.get("quantity", 0),
+                "amount": r.get("amount", 0),
+                "sales_count": r.get("sales_count", 0)
+            }
+            for i, r in enumerate(rows)
+        ]
+    })
 
 @admin_bp.route("/manage-users", methods=["GET", "POST"])
 @login_required
@@ -58,28 +101,81 @@ def delete_user(id):
     flash("User deleted.", "info")
     return redirect(url_for("admin.manage_users"))
 
+JOB_LABELS = {
+    "export": "Business report export",
+    "reconcile": "Totals check",
+    "repair": "Repair batch totals",
+    "recompute": "Analytics recompute",
+    "archive": "Archive old batches & sales"
+}
+
 @admin_bp.route("/export")
 @login_required
 def export():
     if admin_only(): return admin_only()
 
-    products = list(db.products.find({}))
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["Batch", "Qty Sold", "Revenue", "Cost", "Profit"])
-    for p in products:
-        profit = p.get("total_amount_sold", 0) - p.get("batch_cost", 0)
-        writer.writerow([
-            p.get("name", ""),
-            p.get("total_quantity_sold", 0),
-            p.get("total_amount_sold", 0),
-            p.get("batch_cost", 0),
-            profit
-        ])
-    mem = io.BytesIO()
-    mem.write(output.getvalue().encode("utf-8"))
-    mem.seek(0)
-    return send_file(mem, mimetype="text/csv", as_attachment=True, download_name="business_report.csv")
+    jobs.submit("export")
+    flash("Report export started. It will be ready to download below.", "info")
+    return redirect(url_for("admin.job_list"))
+
+@admin_bp.route("/reconcile", methods=["GET", "POST"])
+@login_required
+def reconcile():
+    if admin_only(): return admin_only()
+
+    if request.method == "POST":
+        jobs.submit("reconcile")
+        flash("Totals check started.", "info")
+        return redirect(url_for("admin.job_list"))
+
+    job = jobs.latest("reconcile")
+    path = jobs.artifact_file(job)
+    mismatches = None
+    if path:
+        with open(path, encoding="utf-8") as f:
+            mismatches = json.load(f)
+    return render_template("admin/reconcile.html", job=job, mismatches=mismatches)
+
+@admin_bp.route("/jobs")
+@login_required
+def job_list():
+    if admin_only(): return admin_only()
+
+    return render_template("admin/jobs.html", jobs=jobs.recent(), labels=JOB_LABELS)
+
+@admin_bp.route("/jobs/<name>", methods=["POST"])
+@login_required
+def start_job(name):
+    if admin_only(): return admin_only()
+
+    if name not in JOB_LABELS:
+        flash("Unknown job.", "error")
+    else:
+        jobs.submit(name)
+        flash(f"{JOB_LABELS[name]} started.", "info")
+    return redirect(url_for("admin.job_list"))
+
+@admin_bp.route("/api/jobs/<job_id>")
+@login_required
+def job_status(job_id):
+    if admin_only(): return admin_only()
+
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@admin_bp.route("/jobs/<job_id>/download")
+@login_required
+def job_download(job_id):
+    if admin_only(): return admin_only()
+
+    job = jobs.get(job_id)
+    path = jobs.artifact_file(job)
+    if not path:
+        flash("That file is not available.", "error")
+        return redirect(url_for("admin.job_list"))
+    return send_file(path, mimetype=job["mimetype"], as_attachment=True, download_name=job["artifact"])
 
 @admin_bp.route("/audit")
 @login_required
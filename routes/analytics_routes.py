@@ -2,6 +2,8 @@
 from flask import Blueprint, render_template
 from flask_login import login_required, current_user
 from utils.db import get_db
+from utils.analytics import batch_metrics, metrics_rows, metrics_totals
+from services.archive import archived_totals
 from bson import ObjectId
 from datetime import datetime, timedelta
 
@@ -14,10 +16,16 @@ def analytics():
     if current_user.role != "admin":
         return "Access denied", 403
 
-    products = list(db.products.find({}))
-    total_revenue = sum(p.get("total_amount_sold", 0) for p in products)
-    total_cost = sum(p.get("batch_cost", 0) for p in products)
-    total_profit = total_revenue - total_cost
+    metrics = batch_metrics(db)
+    products = metrics_rows(metrics)
+    totals = metrics_totals(metrics)
+
+    # Charts cover hot batches; headline totals include archived ones
+    archived = archived_totals()
+    totals["total_revenue"] += archived["total_amount_sold"]
+    totals["total_cost"] += archived["batch_cost"]
+    totals["total_profit"] = totals["total_revenue"] - totals["total_cost"]
+    totals["total_quantity"] += archived["total_quantity_sold"]
 
     # 7-day trend
     start_date = datetime.utcnow() - timedelta(days=7)
@@ -33,7 +41,9 @@ def analytics():
 
     return render_template("analytics.html",
                            products=products,
-                           total_revenue=total_revenue,
-                           total_cost=total_cost,
-                           total_profit=total_profit,
+                           total_revenue=totals["total_revenue"],
+                           total_cost=totals["total_cost"],
+                           total_profit=totals["total_profit"],
+                           total_quantity=totals["total_quantity"],
+                           best=max(products, key=lambda p: p["profit"], default=None),
                            trend=trend)
@@ -3,9 +3,9 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash
 from flask_login import login_required, current_user
 from models.product_model import Product
 from models.sale_model import Sale
+from models.user_stats_model import UserStats
+from models.forecast_model import Forecast
 from utils.db import get_db
-from bson import ObjectId
-from datetime import datetime
 
 product_bp = Blueprint("product", __name__, url_prefix="/products")
 db = get_db()
@@ -13,16 +13,11 @@ db = get_db()
 @product_bp.route("/dashboard")
 @login_required
 def dashboard():
-    # Fetch all products
-    products_cursor = db.products.find().sort("created_at", -1)
+    # Totals come from the product counters kept by services.sale_service
+    products_cursor = db.products.find({}, {"sales": 0}).sort("created_at", -1)
     products = []
 
     for p in products_cursor:
-        # Aggregate sales for this batch
-        sales = list(db.sales.find({"product_id": ObjectId(p["_id"])}))
-        total_amount_sold = sum(s["amount"] for s in sales)
-        total_quantity_sold = sum(s["quantity"] for s in sales)
-
         batch_cost = p.get("batch_cost", p.get("cost_price", 0))
 
         products.append({
@@ -33,25 +28,18 @@ def dashboard():
             "sell_price": p.get("unit_price", 0),
             "quantity": p.get("stock_quantity", 0),
             "batch_cost": batch_cost,
-            "total_amount_sold": total_amount_sold,
-            "total_quantity_sold": total_quantity_sold,
+            "total_amount_sold": p.get("total_amount_sold", 0),
+            "total_quantity_sold": p.get("total_quantity_sold", 0),
             "created_at": p.get("created_at")
         })
 
     # Count active batches
     active_count = sum(1 for p in products if p["status"] == "active")
 
-    # Get today's sales for current user
-    today = datetime.utcnow().date()
-    user_sales_today = list(db.sales.find({
-        "user_id": current_user.id,
-        "date": {
-            "$gte": datetime(today.year, today.month, today.day),
-            "$lt": datetime(today.year, today.month, today.day, 23, 59, 59)
-        }
-    }))
-    my_sales_today = sum(s["amount"] for s in user_sales_today)
-    my_items_sold = sum(s["quantity"] for s in user_sales_today)
+    # Today's totals for current user, from the per-user daily counters
+    today_stats = UserStats.get_for_day(current_user.id)
+    my_sales_today = today_stats.get("amount", 0)
+    my_items_sold = today_stats.get("quantity", 0)
 
     # Recent sales by current user
     recent_sales = list(db.sales.find({"user_id": current_user.id}).sort("date", -1).limit(5))
@@ -61,7 +49,8 @@ def dashboard():
                            active_count=active_count,
                            my_sales_today=my_sales_today,
                            my_items_sold=my_items_sold,
-                           recent_sales=recent_sales)
+                           recent_sales=recent_sales,
+                           low_stock=Forecast.low_stock_alerts())
 
 @product_bp.route("/add", methods=["GET", "POST"])
 @login_required
@@ -1,11 +1,11 @@
 # routes/sale_routes.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash
-from flask_login import login_required
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+from flask_login import login_required, current_user
 from models.product_model import Product
 from models.sale_model import Sale
+from services import sale_service
 from bson import ObjectId
 from utils.db import get_db
-from datetime import datetime
 
 
 
@@ -13,66 +13,50 @@ sale_bp = Blueprint("sale", __name__, url_prefix="/sales")
 
 db = get_db()
 
+def _record_from_form(product_id):
+    """
+    Records the sale posted by a sale form. offline-ledger.js adds an
+    idempotency_key, so a submit whose response was lost and that was then
+    queued offline is only counted once.
+    """
+    quantity = request.form.get("quantity", 0, type=int)
+    amount = request.form.get("amount", 0, type=float)
+    key = request.form.get("idempotency_key")
+    extra = {"idempotency_key": key} if key else None
+    try:
+        sale_service.record_sale(product_id, quantity, amount=amount, user=current_user, extra=extra)
+    except sale_service.DuplicateSale:
+        pass
+
+def _after_post(url):
+    # offline-ledger.js submits sale forms with fetch and navigates itself
+    if request.headers.get("X-Offline-Ledger"):
+        return jsonify({"redirect": url})
+    return redirect(url)
+
 @sale_bp.route("/log/<id>", methods=["GET", "POST"])
 @login_required
 def log_sale(id):
-    product = db.products.find_one({"_id": ObjectId(id)})
+    product = Product.get_by_id(id) if ObjectId.is_valid(id) else None
     if not product:
         flash("Product not found.", "error")
         return redirect(url_for("product.dashboard"))
 
-    # Compute total quantity and total amount sold so far
-    sales = list(db.sales.find({"product_id": ObjectId(id)}))
-    total_quantity_sold = sum(s["quantity"] for s in sales)
-    total_amount_sold = sum(s["amount"] for s in sales)
-
     if request.method == "POST":
-        quantity = int(request.form.get("quantity", 0))
-        amount = float(request.form.get("amount", 0))
-
-        if quantity <= 0 or amount <= 0:
-            flash("Invalid sale data.", "error")
-            return redirect(request.url)
-
-        # Audit log: include user info
-        sale_record = {
-            "product_id": ObjectId(id),
-            "product_name": product.get("name", "Unknown"),
-            "quantity": quantity,
-            "amount": amount,
-            "unit_price": amount / quantity,
-            "user_id": current_user.id,
-            "username": current_user.username,
-            "date": datetime.utcnow()
-        }
-
-        db.sales.insert_one(sale_record)
-
-        # Update product totals
-        db.products.update_one(
-            {"_id": ObjectId(id)},
-            {
-                "$inc": {
-                    "total_quantity_sold": quantity,
-                    "total_amount_sold": amount,
-                    "stock_quantity": -quantity
-                },
-                "$push": {"sales": {
-                    "quantity": quantity,
-                    "amount": amount,
-                    "date": sale_record["date"]
-                }}
-            }
-        )
+        try:
+            _record_from_form(id)
+        except ValueError as e:
+            flash(str(e), "error")
+            return _after_post(request.url)
 
         flash(f"Sale logged for {product['name']}", "success")
-        return redirect(url_for("product.dashboard"))
+        return _after_post(url_for("product.dashboard"))
 
     return render_template(
         "log_sale.html",
         product=product,
-        total_quantity_sold=total_quantity_sold,
-        total_amount_sold=total_amount_sold
+        total_quantity_sold=product.get("total_quantity_sold", 0),
+        total_amount_sold=product.get("total_amount_sold", 0)
     )
 
 @sale_bp.route("/recent-sales")
@@ -85,42 +69,51 @@ def recent_sales():
 @sale_bp.route("/quick-sale", methods=["GET", "POST"])
 @login_required
 def quick_sale():
-    # Only show active batches
-    products = list(db.products.find({"status": "active"}).sort("created_at", -1))
-
     if request.method == "POST":
-        product_id = request.form.get("product_id")
-        quantity = int(request.form.get("quantity", 0))
-        amount = float(request.form.get("amount", 0))
-
-        if not product_id or quantity <= 0 or amount <= 0:
-            flash("Please enter valid quantity and amount.", "error")
-            return redirect(url_for("sale.quick_sale"))
-
-        # Save sale
-        sale = {
-            "product_id": product_id,
-            "product_name": db.products.find_one({"_id": product_id})["name"],
-            "quantity": quantity,
-            "amount": amount,
-            "user_id": current_user.id,
-            "username": current_user.username,
-            "date": datetime.utcnow()
-        }
-        db.sales.insert_one(sale)
-
-        # Update product totals
-        db.products.update_one(
-            {"_id": product_id},
-            {
-                "$inc": {
-                    "total_quantity_sold": quantity,
-                    "total_amount_sold": amount
-                }
-            }
-        )
+        try:
+            _record_from_form(request.form.get("product_id"))
+        except ValueError as e:
+            flash(str(e), "error")
+            return _after_post(url_for("sale.quick_sale"))
 
         flash("Sale logged successfully!", "success")
-        return redirect(url_for("product.dashboard"))
+        return _after_post(url_for("product.dashboard"))
 
+    # Only show active batches
+    products = Product.get_active()
     return render_template("admin/quick_sale.html", products=products)
+
+
+# --- Offline ledger API (static/js/offline-ledger.js) ---
+
+def _product_snapshot():
+    return [
+        {
+            "id": str(p["_id"]),
+            "name": p.get("name", ""),
+            "unit_price": p.get("unit_price", 0),
+            "stock_quantity": p.get("stock_quantity", 0)
+        }
+        for p in db.products.find(
+            {"status": "active"}, {"name": 1, "unit_price": 1, "stock_quantity": 1}
+        ).sort("created_at", -1)
+    ]
+
+@sale_bp.route("/api/products")
+@login_required
+def api_products():
+    return jsonify({"products": _product_snapshot()})
+
+@sale_bp.route("/sync", methods=["POST"])
+@login_required
+def sync():
+    payload = request.get_json(silent=True) or {}
+    sales = payload.get("sales")
+    if not isinstance(sales, list):
+        return jsonify({"error": "Expected a JSON body with a 'sales' list"}), 400
+
+    results = sale_service.apply_offline_sales(
+        [s for s in sales if isinstance(s, dict)], current_user
+    )
+    # Fresh stock levels ride back on the same round trip
+    return jsonify({"results": results, "products": _product_snapshot()})
@@ -0,0 +1,43 @@
+"""
+Reports products whose sales counters disagree with the sales ledger.
+
+    python scripts/check_sales.py
+    python scripts/check_sales.py --repair    # fix them from the ledger first
+
+Exits with status 1 when any mismatch is found.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.sale_service import find_inconsistencies, repair_ledger  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--repair", action="store_true",
+                        help="convert text product ids and re-derive batch totals before checking")
+    args = parser.parse_args()
+
+    if args.repair:
+        result = repair_ledger()
+        print(f"Converted {result['converted']} sales, repaired {result['repaired']} batches, "
+              f"skipped {result['skipped']}.")
+
+    mismatches = find_inconsistencies()
+    if not mismatches:
+        print("All product counters match the sales ledger.")
+        return 0
+
+    print(f"{len(mismatches)} product(s) disagree with the ledger:")
+    for m in mismatches:
+        print(f"  {m['product_id']}  {m['name'] or '<no product>'}: "
+              f"qty {m['counter_quantity']} vs {m['ledger_quantity']}, "
+              f"amount {m['counter_amount']} vs {m['ledger_amount']}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
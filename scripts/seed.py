@@ -0,0 +1,275 @@
+"""
+Generates a synthetic shop for profiling at 10x / 100x our current volume.
+
+    python scripts/seed.py --mock --profile                  # in-memory, then time every route
+    python scripts/seed.py --uri mongodb://localhost:27017 --scale 10 --years 2 --drop
+    python scripts/seed.py --uri mongodb://localhost:27017 --scale 100 --db emekaokservice_x100
+
+Documents match what the app writes: products as Product.create plus the
+counters and velocity kept by services.sale_service, sales as
+sale_service.record_sale, users as User.register (password "password"),
+and the per-user daily counters. Everything is bulk-inserted in chunks.
+Scale 1 is roughly today's shop: 5 staff, ~40 sales a day, 15 active batches.
+--mock (like the benchmarks) needs pip install -r requirements-dev.txt.
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import db as db_module  # noqa: E402
+from config import Config  # noqa: E402
+
+CHUNK = 10000
+ITEMS = ["Rice", "Beans", "Garri", "Palm Oil", "Groundnut Oil", "Semovita", "Spaghetti",
+         "Indomie", "Sugar", "Milk", "Tomato Paste", "Yam Flour", "Crayfish", "Salt", "Maggi"]
+
+
+def connect(args):
+    if args.mock:
+        import mongomock
+        client = mongomock.MongoClient()
+    else:
+        from pymongo import MongoClient
+        client = MongoClient(args.uri)
+    if args.drop:
+        client.drop_database(args.db)
+    db = client[args.db]
+    db_module.set_db(db)
+    return db
+
+
+def make_users(db, count, now):
+    from werkzeug.security import generate_password_hash
+
+    password_hash = generate_password_hash("password")
+    docs = [
+        {
+            "username": f"seller{i}",
+            "password_hash": password_hash,
+            "role": "sales",
+            "created_at": now - timedelta(days=random.randint(0, 365))
+        }
+        for i in range(count)
+    ]
+    ids = db.users.insert_many(docs).inserted_ids
+    return [(str(_id), d["username"]) for _id, d in zip(ids, docs)]
+
+
+def make_products(count, start, now, active_target):
+    """
+    Batches spread over the history, each selling for 2-8 weeks. The newest
+    `active_target` batches are still active.
+    """
+    span = (now - start).total_seconds()
+    products = []
+    for i in range(count):
+        created = start + timedelta(seconds=span * i / max(count, 1))
+        unit_price = float(random.choice([300, 500, 800, 1200, 1500, 2500, 4000]))
+        products.append({
+            "name": f"{random.choice(ITEMS)} #{i + 1}",
+            "batch_cost": 0.0,
+            "stock_quantity": 0,
+            "unit_price": unit_price,
+            "status": "finished",
+            "created_at": created,
+            "total_quantity_sold": 0,
+            "total_amount_sold": 0.0,
+            "_ends": min(created + timedelta(days=random.randint(14, 56)), now)
+        })
+    for p in products[-active_target:]:
+        p["status"] = "active"
+        p["_ends"] = now
+    return products
+
+
+def generate(db, args):
+    random.seed(args.seed)
+    now = datetime.utcnow()
+    start = now - timedelta(days=int(365 * args.years))
+    scale = args.scale
+
+    staff = args.users or max(1, round(5 * scale))
+    per_day = args.sales_per_day or 40 * scale
+    # The app caps active batches at 15; more volume means faster turnover
+    active_target = 15
+    product_count = args.products or max(active_target, round(active_target * scale * 365 * args.years / 35))
+    tau = float(Config.VELOCITY_HALF_LIFE_DAYS) / math.log(2)
+
+    t0 = time.perf_counter()
+    users = make_users(db, staff, now)
+    products = make_products(product_count, start, now, active_target)
+    pids = db.products.insert_many(
+        [{k: v for k, v in p.items() if not k.startswith("_")} for p in products]
+    ).inserted_ids
+    for p, _id in zip(products, pids):
+        p["_id"] = _id
+
+    counters = {}
+    velocity = {}
+    last_sale = {}
+    buffer, total_sales = [], 0
+    ordered = sorted(range(len(products)), key=lambda i: products[i]["created_at"])
+    first_open = 0
+
+    day = start
+    while day < now:
+        day_end = min(day + timedelta(days=1), now)
+        while first_open < len(ordered) and products[ordered[first_open]]["_ends"] < day:
+            first_open += 1
+        selling = [products[i] for i in ordered[first_open:]
+                   if products[i]["created_at"] < day_end and products[i]["_ends"] > day]
+        if selling:
+            for _ in range(max(0, int(random.gauss(per_day, per_day * 0.2)))):
+                p = random.choice(selling)
+                lo = max(day, p["created_at"])
+                hi = min(day_end, p["_ends"])
+                when = lo + (hi - lo) * random.random()
+                qty = random.choice([1, 1, 1, 2, 2, 3, 5])
+                amount = qty * p["unit_price"]
+                user_id, username = random.choice(users)
+
+                buffer.append({
+                    "product_id": p["_id"],
+                    "product_name": p["name"],
+                    "quantity": qty,
+                    "unit_price": p["unit_price"],
+                    "amount": amount,
+                    "date": when,
+                    "user_id": user_id,
+                    "username": username
+                })
+                p["total_quantity_sold"] += qty
+                p["total_amount_sold"] += amount
+                key = (user_id, when.strftime("%Y-%m-%d"))
+                c = counters.setdefault(key, {"username": username, "quantity": 0, "amount": 0.0, "sales_count": 0})
+                c["quantity"] += qty
+                c["amount"] += amount
+                c["sales_count"] += 1
+                age = (now - when).total_seconds() / 86400.0
+                velocity[p["_id"]] = velocity.get(p["_id"], 0.0) + qty / tau * math.exp(-age / tau)
+                last_sale[p["_id"]] = max(last_sale.get(p["_id"], when), when)
+
+                if len(buffer) >= CHUNK:
+                    db.sales.insert_many(buffer, ordered=False)
+                    total_sales += len(buffer)
+                    buffer = []
+                    print(f"  {total_sales:,} sales (through {day:%Y-%m-%d})", flush=True)
+        day = day_end
+
+    if buffer:
+        db.sales.insert_many(buffer, ordered=False)
+        total_sales += len(buffer)
+
+    updates = []
+    for p in products:
+        sold = p["total_quantity_sold"]
+        remaining = random.randint(sold // 4, sold) if p["status"] == "active" else 0
+        # Cost the batch so that margins land between -10% and +35%
+        cost = p["total_amount_sold"] * (sold + remaining) / max(sold, 1) / random.uniform(0.9, 1.35)
+        fields = {
+            "stock_quantity": remaining,
+            "batch_cost": round(cost or p["unit_price"] * 20, 2),
+            "total_quantity_sold": sold,
+            "total_amount_sold": p["total_amount_sold"],
+            "velocity": velocity.get(p["_id"], 0.0),
+            "velocity_at": now
+        }
+        if p["status"] == "finished":
+            fields["finished_at"] = last_sale.get(p["_id"], p["_ends"])
+        updates.append(({"_id": p["_id"]}, {"$set": fields}))
+    for i in range(0, len(updates), CHUNK):
+        _bulk_update(db.products, updates[i:i + CHUNK], args.mock)
+
+    if counters:
+        db.user_daily_sales.insert_many([
+            {"user_id": user_id, "day": day_key, **c} for (user_id, day_key), c in counters.items()
+        ])
+
+    elapsed = time.perf_counter() - t0
+    print(f"Seeded {staff} users, {len(products):,} batches ({active_target} active), "
+          f"{total_sales:,} sales over {args.years:g} year(s) in {elapsed:.1f}s "
+          f"({total_sales / max(elapsed, 1e-9):,.0f} sales/s)")
+
+
+def _bulk_update(collection, updates, mock):
+    """
+    Applies (filter, update) pairs: one bulk_write on MongoDB, one
+    update_one each on mongomock, which lags behind pymongo's bulk API.
+    """
+    if mock:
+        for query, update in updates:
+            collection.update_one(query, update)
+        return
+    from pymongo import UpdateOne
+    collection.bulk_write([UpdateOne(query, update) for query, update in updates], ordered=False)
+
+
+def profile_routes(db, repeat):
+    """
+    Times every page as the admin and as a seller using Flask's test client.
+    """
+    os.environ["ADMIN_USERNAME"] = "sim-admin"
+    os.environ["ADMIN_PASSWORD"] = "sim-admin"
+    import app as app_module
+
+    client = app_module.app.test_client()
+    product_id = str(db.products.find_one({"status": "active"})["_id"])
+    routes = {
+        "admin": ["/admin/dashboard", "/analytics/", "/admin/leaderboard?period=day",
+                  "/admin/leaderboard?period=month", "/admin/api/leaderboard?period=week",
+                  "/sales/recent-sales", "/admin/manage-users", "/sales/api/products"],
+        "seller": ["/products/dashboard", "/sales/quick-sale", f"/sales/log/{product_id}"]
+    }
+    logins = {"admin": ("sim-admin", "sim-admin"), "seller": ("seller0", "password")}
+
+    print(f"\n{'route':<40}{'as':>8}{'median ms':>12}{'status':>8}")
+    for role, paths in routes.items():
+        client.get("/auth/logout")
+        username, password = logins[role]
+        client.post("/auth/login", data={"username": username, "password": password})
+        for path in paths:
+            timings, status = [], None
+            for _ in range(repeat):
+                start = time.perf_counter()
+                status = client.get(path).status_code
+                timings.append((time.perf_counter() - start) * 1000)
+            timings.sort()
+            print(f"{path:<40}{role:>8}{timings[len(timings) // 2]:>12.1f}{status:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--uri", help="MongoDB URI of a local mongod")
+    target.add_argument("--mock", action="store_true", help="seed an in-memory mongomock database")
+    parser.add_argument("--db", default="emekaokservice_sim", help="database name (never the live one by default)")
+    parser.add_argument("--drop", action="store_true", help="drop the database first")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier on today's volume, e.g. 10 or 100")
+    parser.add_argument("--years", type=float, default=1.0, help="years of history")
+    parser.add_argument("--users", type=int, help="sales staff (default 5 x scale)")
+    parser.add_argument("--products", type=int, help="total batches over the history")
+    parser.add_argument("--sales-per-day", type=float, help="average sales per day (default 40 x scale)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed")
+    parser.add_argument("--profile", action="store_true", help="time every route after seeding")
+    parser.add_argument("--repeat", type=int, default=5, help="requests per route when profiling")
+    args = parser.parse_args()
+
+    if args.mock:
+        args.drop = True
+    db = connect(args)
+    if db.sales.estimated_document_count():
+        sys.exit(f"Database {args.db!r} already has sales; pass --drop to replace it.")
+
+    generate(db, args)
+    if args.profile:
+        profile_routes(db, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# services/admin_tasks.py
+"""
+Heavy admin tasks, run in the background by services.jobs.
+"""
+import csv
+import json
+from services.jobs import task
+from services import sale_service, archive
+from utils.analytics import batch_metrics, metrics_rows
+from models.user_stats_model import UserStats
+from models.forecast_model import Forecast
+
+
+@task("export")
+def export_report(job):
+    job.progress(0.05, "Computing batch metrics")
+    rows = metrics_rows(batch_metrics(include_archived=True))
+
+    filename = "business_report.csv"
+    pct = lambda v: "" if v is None else round(v * 100, 1)
+    with open(job.artifact_path(filename), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Batch", "Status", "Qty Sold", "Stock Left", "Revenue", "Cost", "Profit",
+                         "Margin %", "Sell-through %", "Days to Sell Out", "Revenue/Day"])
+        for i, r in enumerate(rows):
+            writer.writerow([
+                r["name"],
+                r["status"],
+                r["total_quantity_sold"],
+                r["stock_quantity"],
+                r["total_amount_sold"],
+                r["batch_cost"],
+                r["profit"],
+                pct(r["margin"]),
+                pct(r["sell_through"]),
+                "" if r["days_to_sell_out"] is None else round(r["days_to_sell_out"], 1),
+                round(r["revenue_per_day"], 2)
+            ])
+            if i % 500 == 0:
+                job.progress(0.1 + 0.9 * i / len(rows), f"Writing {i}/{len(rows)} batches")
+    return filename, "text/csv"
+
+
+@task("reconcile")
+def reconcile(job):
+    job.progress(0.1, "Comparing product counters with the sales ledger")
+    mismatches = sale_service.find_inconsistencies()
+
+    filename = "reconcile.json"
+    with open(job.artifact_path(filename), "w", encoding="utf-8") as f:
+        json.dump(mismatches, f, default=str, indent=2)
+    job.progress(1.0, f"{len(mismatches)} mismatch(es)")
+    return filename, "application/json"
+
+
+@task("repair")
+def repair_sales(job):
+    sale_service.repair_ledger(progress=job.progress)
+
+
+@task("recompute")
+def recompute_analytics(job):
+    job.progress(0.1, "Rebuilding staff daily counters")
+    days = UserStats.rebuild()
+    job.progress(0.5, "Rebuilding sales velocity")
+    products = Forecast.rebuild()
+    job.progress(1.0, f"Rebuilt {days} staff-day counters and {products} product velocities")
+
+
+@task("archive")
+def archive_old_data(job):
+    archive.archive(progress=job.progress)
@@ -0,0 +1,170 @@
+# services/archive.py
+"""
+Archiving of finished batches and old sales.
+
+Finished batches (with all their sales) and any sale older than the archive
+horizon are moved from the hot `products`/`sales` collections into
+`products_archive`/`sales_archive`. Product counters travel with the product,
+and the money totals of archived batches are kept in a summary document,
+recomputed after each run, so dashboards stay correct without reading the
+archive. find_all() and
+aggregate_all() let reports read hot and archived data together.
+"""
+from datetime import datetime, timedelta
+from config import Config
+from utils.db import get_db, driver
+
+db = get_db()
+
+ARCHIVES = {"products": "products_archive", "sales": "sales_archive"}
+SUMMARY_ID = "archived_batches"
+CHUNK = 500
+
+
+def ensure_indexes():
+    from pymongo import ASCENDING
+
+    db.sales.create_index([("date", ASCENDING)])
+    db.products.create_index([("status", ASCENDING), ("finished_at", ASCENDING)])
+    db.sales_archive.create_index([("product_id", ASCENDING)])
+    db.sales_archive.create_index([("date", ASCENDING)])
+
+
+def find_all(name, query=None, projection=None):
+    """
+    Yields matching documents from the hot collection, then its archive.
+    """
+    yield from db[name].find(query or {}, projection)
+    yield from db[ARCHIVES[name]].find(query or {}, projection)
+
+
+def aggregate_all(name, pipeline):
+    """
+    Runs the pipeline on the hot collection and on its archive and returns
+    both result lists concatenated. Callers that $group must merge rows
+    sharing an _id themselves.
+    """
+    return list(db[name].aggregate(pipeline)) + list(db[ARCHIVES[name]].aggregate(pipeline))
+
+
+def archived_totals():
+    """
+    Money totals of every archived batch, recomputed by archive().
+    """
+    doc = db.archive_summary.find_one({"_id": SUMMARY_ID}) or {}
+    return {
+        "batches": doc.get("batches", 0),
+        "total_quantity_sold": doc.get("total_quantity_sold", 0),
+        "total_amount_sold": doc.get("total_amount_sold", 0.0),
+        "batch_cost": doc.get("batch_cost", 0.0)
+    }
+
+
+def rebuild_summary():
+    """
+    Recomputes the archive summary from the archived batches themselves.
+    """
+    totals = {"batches": 0, "total_quantity_sold": 0, "total_amount_sold": 0.0, "batch_cost": 0.0}
+    for p in db[ARCHIVES["products"]].find({}, {"total_quantity_sold": 1, "total_amount_sold": 1, "batch_cost": 1}):
+        totals["batches"] += 1
+        totals["total_quantity_sold"] += p.get("total_quantity_sold", 0) or 0
+        totals["total_amount_sold"] += float(p.get("total_amount_sold", 0) or 0)
+        totals["batch_cost"] += float(p.get("batch_cost", 0) or 0)
+    db.archive_summary.update_one({"_id": SUMMARY_ID}, {"$set": totals}, upsert=True)
+    return totals
+
+
+def _move(source, target, docs):
+    """
+    Copies docs into the archive and then deletes them from the hot collection.
+    Docs already archived by an interrupted earlier run are skipped.
+    """
+    if not docs:
+        return 0
+    try:
+        db[target].insert_many(docs, ordered=False)
+    except driver().errors.BulkWriteError as e:
+        if any(err.get("code") != 11000 for err in e.details.get("writeErrors", [])):
+            raise
+    return db[source].delete_many({"_id": {"$in": [d["_id"] for d in docs]}}).deleted_count
+
+
+def _move_batch_sales(product_id):
+    # Older quick sales stored product_id as a string
+    ids = [product_id, str(product_id)]
+    while True:
+        sales = list(db.sales.find({"product_id": {"$in": ids}}).limit(CHUNK))
+        if not sales:
+            break
+        _move("sales", "sales_archive", sales)
+
+
+def _archive_batch(product):
+    """
+    Moves one finished batch and its sales. Every step can be rerun: the
+    copy is made before the hot document is removed, and the removed
+    document (with any sale that landed meanwhile) is what ends up archived.
+    """
+    _move_batch_sales(product["_id"])
+
+    current = db.products.find_one({"_id": product["_id"]})
+    if current is None:
+        return
+    db.products_archive.replace_one({"_id": current["_id"]}, current, upsert=True)
+    removed = db.products.find_one_and_delete({"_id": current["_id"]})
+    if removed is not None:
+        if removed != current:
+            db.products_archive.replace_one({"_id": removed["_id"]}, removed, upsert=True)
+        # Keeps dashboards current during the run; archive() recomputes the
+        # summary at the end in case an earlier run stopped right here
+        db.archive_summary.update_one(
+            {"_id": SUMMARY_ID},
+            {"$inc": {
+                "batches": 1,
+                "total_quantity_sold": removed.get("total_quantity_sold", 0),
+                "total_amount_sold": float(removed.get("total_amount_sold", 0) or 0),
+                "batch_cost": float(removed.get("batch_cost", 0) or 0)
+            }},
+            upsert=True
+        )
+    # Sales logged between the first sweep and the delete
+    _move_batch_sales(product["_id"])
+
+
+def archive(horizon_days=None, progress=None):
+    """
+    Moves finished batches older than the horizon, and sales older than the
+    horizon, into the archive collections. Returns counts of what moved.
+    `progress(fraction, message)` is called as work proceeds.
+    """
+    horizon = int(horizon_days if horizon_days is not None else Config.ARCHIVE_AFTER_DAYS)
+    cutoff = datetime.utcnow() - timedelta(days=horizon)
+    progress = progress or (lambda fraction, message=None: None)
+
+    finished = list(db.products.find({
+        "status": "finished",
+        "$or": [
+            {"finished_at": {"$lt": cutoff}},
+            # Batches finished before finished_at was recorded
+            {"finished_at": {"$exists": False}, "created_at": {"$lt": cutoff}}
+        ]
+    }))
+    for i, product in enumerate(finished):
+        progress(0.8 * i / len(finished), f"Archiving batch {i + 1}/{len(finished)}")
+        _archive_batch(product)
+
+    progress(0.8, "Archiving old sales")
+    old_sales = 0
+    while True:
+        sales = list(db.sales.find({"date": {"$lt": cutoff}}).limit(CHUNK))
+        if not sales:
+            break
+        old_sales += _move("sales", "sales_archive", sales)
+
+    # Recomputed from the archive, so an interrupted run can't leave a
+    # batch's totals lost or counted twice
+    progress(0.95, "Updating archive totals")
+    rebuild_summary()
+
+    progress(1.0, f"Archived {len(finished)} batches and {old_sales} older sales")
+    return {"batches": len(finished), "sales": old_sales}
@@ -0,0 +1,262 @@
+# services/jobs.py
+"""
+In-process background job runner for heavy admin tasks.
+
+Tasks are plain functions registered with @task("name"); submit() queues one
+on a small thread pool and returns its id. Job state lives in a local SQLite
+table so every gunicorn worker sees the same list, and artifacts (exports,
+reports) are written to a per-job folder for later download.
+
+Each process heartbeats the jobs it owns. Whenever jobs are listed, any
+unfinished job whose owner has died or stopped heartbeating is marked
+failed, so a killed worker never leaves a job "running" forever.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from config import Config
+
+TASKS = {}
+
+HEARTBEAT_SECONDS = 10
+# A job not heartbeated for this long belongs to a dead or hung process
+STALE_AFTER_SECONDS = 60
+
+_executor = None
+_heartbeat = None
+_lock = threading.Lock()
+_initialized = False
+# Ids of jobs queued or running in this process
+_active = set()
+
+
+def task(name):
+    """
+    Registers fn(job, **params) as a background task. The function may return
+    (filename, mimetype) for an artifact it wrote to job.artifact_path(filename).
+    """
+    def decorator(fn):
+        TASKS[name] = fn
+        return fn
+    return decorator
+
+
+def _connect():
+    os.makedirs(Config.JOBS_DIR, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(Config.JOBS_DIR, "jobs.sqlite3"), timeout=10)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, TypeError):
+        return pid is not None
+    return True
+
+
+def _init():
+    global _initialized
+    with _lock:
+        if _initialized:
+            return
+        with _connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    params TEXT,
+                    status TEXT NOT NULL,
+                    progress REAL DEFAULT 0,
+                    message TEXT,
+                    artifact TEXT,
+                    mimetype TEXT,
+                    error TEXT,
+                    pid INTEGER,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT,
+                    heartbeat_at TEXT
+                )
+            """)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "heartbeat_at" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at TEXT")
+        _initialized = True
+
+
+def _reap():
+    """
+    Fails unfinished jobs that will never finish: their process is gone, or
+    it is this process and it isn't running them (a reused pid), or nothing
+    has heartbeated them recently.
+    """
+    stale = (datetime.utcnow() - timedelta(seconds=STALE_AFTER_SECONDS)).isoformat(timespec="seconds")
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT id, pid, heartbeat_at, created_at FROM jobs WHERE status IN ('queued', 'running')"
+        ).fetchall()
+        for row in rows:
+            if row["pid"] == os.getpid():
+                dead = row["id"] not in _active
+            else:
+                dead = not _alive(row["pid"]) or (row["heartbeat_at"] or row["created_at"]) < stale
+            if dead:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = 'Interrupted: worker stopped', finished_at = ? "
+                    "WHERE id = ? AND status IN ('queued', 'running')",
+                    (_now(), row["id"])
+                )
+
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(HEARTBEAT_SECONDS)
+        ids = list(_active)
+        if not ids:
+            continue
+        try:
+            with _connect() as conn:
+                conn.executemany("UPDATE jobs SET heartbeat_at = ? WHERE id = ?", [(_now(), i) for i in ids])
+        except sqlite3.Error:
+            traceback.print_exc()
+
+
+def active_count():
+    """
+    Jobs queued or running in this process.
+    """
+    return len(_active)
+
+
+def _update(job_id, **fields):
+    cols = ", ".join(f"{k} = ?" for k in fields)
+    with _connect() as conn:
+        conn.execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+
+
+def _now():
+    return datetime.utcnow().isoformat(timespec="seconds")
+
+
+def _get_executor():
+    global _executor, _heartbeat
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=Config.JOB_WORKERS, thread_name_prefix="job")
+            _heartbeat = threading.Thread(target=_heartbeat_loop, name="job-heartbeat", daemon=True)
+            _heartbeat.start()
+        return _executor
+
+
+class Job:
+    """
+    Handle passed to a running task for reporting progress and writing artifacts.
+    """
+
+    def __init__(self, job_id, name):
+        self.id = job_id
+        self.name = name
+
+    def progress(self, fraction, message=None):
+        fields = {"progress": max(0.0, min(1.0, float(fraction)))}
+        if message is not None:
+            fields["message"] = message
+        _update(self.id, **fields)
+
+    def artifact_path(self, filename):
+        folder = os.path.join(Config.JOBS_DIR, self.id)
+        os.makedirs(folder, exist_ok=True)
+        return os.path.join(folder, filename)
+
+
+def _run(job_id, name, params):
+    _update(job_id, status="running", started_at=_now(), heartbeat_at=_now())
+    try:
+        result = TASKS[name](Job(job_id, name), **params)
+        fields = {"status": "done", "progress": 1.0, "finished_at": _now()}
+        if result:
+            fields["artifact"], fields["mimetype"] = result
+        _update(job_id, **fields)
+    except Exception as e:
+        traceback.print_exc()
+        _update(job_id, status="failed", error=str(e) or e.__class__.__name__, finished_at=_now())
+    finally:
+        _active.discard(job_id)
+
+
+def submit(name, **params):
+    """
+    Queues a registered task and returns the new job id.
+    """
+    if name not in TASKS:
+        raise ValueError(f"Unknown job: {name}")
+    _init()
+    job_id = uuid.uuid4().hex
+    # Marked active before the row exists so _reap() never sees it orphaned
+    _active.add(job_id)
+    try:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, name, params, status, pid, created_at, heartbeat_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, name, json.dumps(params), os.getpid(), _now(), _now())
+            )
+    except Exception:
+        _active.discard(job_id)
+        raise
+    _get_executor().submit(_run, job_id, name, params)
+    return job_id
+
+
+def get(job_id):
+    _init()
+    _reap()
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return dict(row) if row else None
+
+
+def recent(limit=20, name=None):
+    _init()
+    _reap()
+    query = "SELECT * FROM jobs"
+    args = []
+    if name:
+        query += " WHERE name = ?"
+        args.append(name)
+    query += " ORDER BY created_at DESC LIMIT ?"
+    args.append(int(limit))
+    with _connect() as conn:
+        return [dict(r) for r in conn.execute(query, args)]
+
+
+def latest(name, status="done"):
+    _init()
+    _reap()
+    with _connect() as conn:
+        row = conn.execute(
+            "SELECT * FROM jobs WHERE name = ? AND status = ? ORDER BY created_at DESC LIMIT 1",
+            (name, status)
+        ).fetchone()
+    return dict(row) if row else None
+
+
+def artifact_file(job):
+    """
+    Absolute path of a finished job's artifact, or None.
+    """
+    if not job or job["status"] != "done" or not job["artifact"]:
+        return None
+    path = os.path.join(Config.JOBS_DIR, job["id"], job["artifact"])
+    return path if os.path.exists(path) else None
@@ -0,0 +1,405 @@
+# services/sale_service.py
+"""
+Single write path for sales.
+
+Every sale goes through record_sale(), which validates the input, applies the
+product counters (stock, totals, velocity) in one conditional atomic update,
+appends the sale to the ledger and bumps the seller's daily counter.
+"""
+import math
+from datetime import datetime, timedelta
+from bson import ObjectId, errors
+from config import Config
+from utils.db import get_db, driver
+from models.forecast_model import velocity_update, velocity_revert
+from models.user_stats_model import UserStats
+from services import archive
+from services.archive import ARCHIVES, SUMMARY_ID, find_all, aggregate_all
+
+db = get_db()
+
+# Counters and ledger may differ by float rounding on amounts
+AMOUNT_TOLERANCE = 0.01
+
+
+class InsufficientStock(ValueError):
+    pass
+
+
+class DuplicateSale(Exception):
+    """
+    A sale with the same idempotency key is already in the ledger.
+    """
+
+
+def ensure_indexes():
+    # Offline sales carry a client-generated key; replays must not double-count
+    db.sales.create_index("idempotency_key", unique=True, sparse=True)
+
+
+def _object_id(product_id):
+    try:
+        return ObjectId(product_id)
+    except (errors.InvalidId, TypeError):
+        raise ValueError("Product not found")
+
+
+def _finite(value, message):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(message)
+    if not math.isfinite(value):
+        raise ValueError(message)
+    return value
+
+
+def _diagnose(oid, qty, enforce_stock, price_from_product):
+    """
+    Explains why the conditional update matched nothing. Only runs on failure.
+    """
+    product = db.products.find_one({"_id": oid}, {"stock_quantity": 1, "unit_price": 1})
+    if not product:
+        return ValueError("Product not found")
+    if price_from_product and float(product.get("unit_price", 0) or 0) <= 0:
+        return ValueError("Unit price must be positive")
+    if enforce_stock and int(product.get("stock_quantity", 0) or 0) < qty:
+        return InsufficientStock("Insufficient stock")
+    return ValueError("Sale could not be recorded")
+
+
+def record_sale(product_id, quantity, amount=None, unit_price=None, user=None,
+                when=None, enforce_stock=False, extra=None):
+    """
+    Records one sale and returns the inserted sale document.
+
+    The sale amount is `amount` if given, else quantity * unit_price, else
+    quantity * the product's stored unit price. With enforce_stock=True the
+    sale is rejected unless the batch has enough stock left. `user` is the
+    seller (anything with id/username); `extra` adds fields to the ledger row.
+    Raises ValueError on invalid input or unknown product, and its subclass
+    InsufficientStock when enforce_stock rejects the sale. Raises
+    DuplicateSale when extra carries an idempotency_key already recorded.
+    """
+    oid = _object_id(product_id)
+    try:
+        qty = int(quantity)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("Quantity must be positive")
+    if qty <= 0:
+        raise ValueError("Quantity must be positive")
+
+    # NaN and infinity pass a "> 0" check but poison every total they touch
+    if amount is not None:
+        amount = _finite(amount, "Amount must be positive")
+        if amount <= 0:
+            raise ValueError("Amount must be positive")
+    elif unit_price is not None:
+        unit_price = _finite(unit_price, "Unit price must be positive")
+        if unit_price <= 0:
+            raise ValueError("Unit price must be positive")
+        amount = qty * unit_price
+
+    price_from_product = amount is None
+    when = when or datetime.utcnow()
+
+    query = {"_id": oid}
+    if enforce_stock:
+        query["stock_quantity"] = {"$gte": qty}
+    if price_from_product:
+        query["unit_price"] = {"$gt": 0}
+
+    amount_expr = {"$multiply": [qty, "$unit_price"]} if price_from_product else amount
+    counters = {
+        "stock_quantity": {"$subtract": [{"$ifNull": ["$stock_quantity", 0]}, qty]},
+        "total_quantity_sold": {"$add": [{"$ifNull": ["$total_quantity_sold", 0]}, qty]},
+        "total_amount_sold": {"$add": [{"$ifNull": ["$total_amount_sold", 0]}, amount_expr]},
+    }
+    counters.update(velocity_update(qty, when))
+
+    product = db.products.find_one_and_update(
+        query,
+        [{"$set": counters}],
+        projection={"name": 1, "unit_price": 1},
+        return_document=driver().ReturnDocument.BEFORE
+    )
+    if product is None:
+        raise _diagnose(oid, qty, enforce_stock, price_from_product)
+
+    if price_from_product:
+        amount = qty * float(product["unit_price"])
+
+    sale = {
+        "product_id": oid,
+        "product_name": product.get("name", "Unknown"),
+        "quantity": qty,
+        "unit_price": amount / qty,
+        "amount": amount,
+        "date": when
+    }
+    if user is not None:
+        sale["user_id"] = str(user.id)
+        sale["username"] = user.username
+    if extra:
+        sale.update(extra)
+
+    try:
+        db.sales.insert_one(sale)
+    except Exception as e:
+        # Keep counters in step with the ledger if the insert fails
+        db.products.update_one({"_id": oid}, [{"$set": {
+            "stock_quantity": {"$add": [{"$ifNull": ["$stock_quantity", 0]}, qty]},
+            "total_quantity_sold": {"$subtract": [{"$ifNull": ["$total_quantity_sold", 0]}, qty]},
+            "total_amount_sold": {"$subtract": [{"$ifNull": ["$total_amount_sold", 0]}, amount]},
+            **velocity_revert(qty, when)
+        }}])
+        if isinstance(e, driver().errors.DuplicateKeyError):
+            raise DuplicateSale("Sale already recorded") from e
+        raise
+
+    if user is not None:
+        UserStats.record(user.id, user.username, qty, amount, when)
+    return sale
+
+
+def apply_offline_sales(sales, user):
+    """
+    Applies sales queued by the PWA while offline, in one call.
+
+    Each item needs idempotency_key, product_id, quantity and amount, and
+    carries the user_id of the seller who logged it and recorded_at (ISO
+    8601, UTC). Items are applied oldest first, ties broken by key, so every
+    replay resolves the same way:
+    - a key already in the ledger is reported as "duplicate" and skipped;
+    - an item logged by another user is "deferred" untouched: it is only
+      credited when its own seller syncs it;
+    - an item without user_id (queued before sellers were recorded) is
+      recorded without a seller, flagged conflict="unattributed", so it
+      counts for the batch but on nobody's leaderboard;
+    - a sale larger than the batch's remaining stock is still recorded (the
+      money was taken) but flagged conflict="oversold" on the ledger row,
+      so earlier sales get the stock first;
+    - invalid items and unknown products are "rejected" with a reason.
+    A recorded_at in the future, or more than OFFLINE_SALE_MAX_AGE_DAYS
+    old (a device clock reset to 1970), is replaced by the sync time; the
+    claimed value is kept on the ledger row as recorded_at_client.
+    Returns one result dict per item, in application order.
+    """
+    now = datetime.utcnow()
+    earliest = now - timedelta(days=Config.OFFLINE_SALE_MAX_AGE_DAYS)
+    items = []
+    for item in sales:
+        try:
+            recorded = datetime.fromisoformat(str(item.get("recorded_at")).replace("Z", "+00:00"))
+            recorded = recorded.replace(tzinfo=None) - (recorded.utcoffset() or timedelta())
+        except (ValueError, OverflowError):
+            recorded = None
+        if recorded is None or not earliest <= recorded <= now:
+            item = dict(item, _clock_adjusted=True)
+            recorded = now
+        items.append((recorded, str(item.get("idempotency_key") or ""), item))
+    items.sort(key=lambda t: (t[0], t[1]))
+
+    keys = [key for _, key, _ in items if key]
+    seen = {s["idempotency_key"] for s in db.sales.find({"idempotency_key": {"$in": keys}}, {"idempotency_key": 1})}
+
+    results = []
+    for recorded, key, item in items:
+        result = {"idempotency_key": key}
+        results.append(result)
+        if not key:
+            result.update(status="rejected", reason="Missing idempotency key")
+            continue
+        if key in seen:
+            result["status"] = "duplicate"
+            continue
+        owner = item.get("user_id")
+        if owner is not None and str(owner) != str(user.id):
+            result.update(status="deferred", reason="Logged by another user")
+            continue
+        seen.add(key)
+
+        extra = {"idempotency_key": key, "source": "offline"}
+        if item.get("_clock_adjusted") and item.get("recorded_at"):
+            extra["recorded_at_client"] = str(item["recorded_at"])[:64]
+            result["clock_adjusted"] = True
+        seller = user
+        if owner is None:
+            extra.update(conflict="unattributed", synced_by=user.username)
+            result["conflict"] = "unattributed"
+            seller = None
+        args = (item.get("product_id"), item.get("quantity"))
+        kwargs = {"amount": item.get("amount"), "user": seller, "when": recorded}
+        try:
+            try:
+                sale = record_sale(*args, enforce_stock=True, extra=extra, **kwargs)
+            except InsufficientStock:
+                extra.setdefault("conflict", "oversold")
+                sale = record_sale(*args, extra=extra, **kwargs)
+                result["conflict"] = extra["conflict"]
+            result.update(status="applied", sale_id=str(sale["_id"]))
+        except DuplicateSale:
+            # Same key applied concurrently by another request
+            result["status"] = "duplicate"
+        except (ValueError, TypeError) as e:
+            result.update(status="rejected", reason=str(e))
+    return results
+
+
+def void_sale(sale_id):
+    """
+    Removes a sale from the ledger and reverses its counters.
+    Returns the removed sale, or None if it didn't exist.
+    """
+    try:
+        oid = ObjectId(sale_id)
+    except (errors.InvalidId, TypeError):
+        return None
+
+    sale = db.sales.find_one_and_delete({"_id": oid})
+    if not sale:
+        return None
+
+    db.products.update_one(
+        {"_id": sale["product_id"]},
+        {"$inc": {
+            "total_quantity_sold": -sale["quantity"],
+            "total_amount_sold": -sale["amount"],
+            "stock_quantity": sale["quantity"]
+        }}
+    )
+    if sale.get("user_id"):
+        db.user_daily_sales.update_one(
+            {"user_id": sale["user_id"], "day": UserStats.day_key(sale["date"])},
+            {"$inc": {"quantity": -sale["quantity"], "amount": -sale["amount"], "sales_count": -1}}
+        )
+    return sale
+
+
+def find_inconsistencies():
+    """
+    Compares every product's counters with the totals in the sales ledger,
+    archived batches and sales included. Returns one row per product whose
+    counters disagree or aren't finite numbers (NaN never compares unequal),
+    plus ledger rows whose product_id matches no product.
+    """
+    pipeline = [
+        {"$group": {
+            "_id": "$product_id",
+            "quantity": {"$sum": "$quantity"},
+            "amount": {"$sum": "$amount"},
+            "sales_count": {"$sum": 1}
+        }}
+    ]
+    ledger = {}
+    for r in aggregate_all("sales", pipeline):
+        # Older quick sales stored product_id as a string
+        entry = ledger.setdefault(str(r["_id"]), {"quantity": 0, "amount": 0.0, "sales_count": 0})
+        entry["quantity"] += r["quantity"]
+        entry["amount"] += r["amount"]
+        entry["sales_count"] += r["sales_count"]
+
+    report = []
+    fields = {"name": 1, "total_quantity_sold": 1, "total_amount_sold": 1}
+    for p in find_all("products", {}, fields):
+        totals = ledger.pop(str(p["_id"]), {"quantity": 0, "amount": 0.0, "sales_count": 0})
+        counter_qty = int(p.get("total_quantity_sold", 0) or 0)
+        counter_amount = float(p.get("total_amount_sold", 0) or 0)
+        if counter_qty != totals["quantity"] or not math.isfinite(counter_amount) \
+                or not math.isfinite(totals["amount"]) \
+                or abs(counter_amount - totals["amount"]) > AMOUNT_TOLERANCE:
+            report.append({
+                "product_id": p["_id"],
+                "name": p.get("name", ""),
+                "counter_quantity": counter_qty,
+                "ledger_quantity": totals["quantity"],
+                "counter_amount": counter_amount,
+                "ledger_amount": totals["amount"],
+                "sales_count": totals["sales_count"]
+            })
+
+    for product_id, totals in ledger.items():
+        report.append({
+            "product_id": product_id,
+            "name": None,
+            "counter_quantity": None,
+            "ledger_quantity": totals["quantity"],
+            "counter_amount": None,
+            "ledger_amount": totals["amount"],
+            "sales_count": totals["sales_count"]
+        })
+    return report
+
+
+def repair_ledger(progress=None):
+    """
+    One-off repair for sales logged before every write went through
+    record_sale(). Older quick sales stored product_id as a string, and their
+    counter update matched no product, so those sales never reached the
+    batch totals or stock. This converts string product_ids to ObjectIds,
+    hot and archived, then moves each mismatched product's totals and stock
+    by the difference with the ledger; a NaN or infinite amount counter is
+    set to the ledger total instead. A product that sells while being
+    repaired is skipped; running the repair again picks it up. Products
+    whose ledger rows themselves hold a NaN or infinite amount can't be
+    derived and are skipped too.
+    Returns counts of converted sales, repaired and skipped products.
+    `progress(fraction, message)` is called as work proceeds.
+    """
+    progress = progress or (lambda fraction, message=None: None)
+
+    converted = 0
+    progress(0.05, "Converting text product ids")
+    for name in ("sales", ARCHIVES["sales"]):
+        ids = db[name].distinct("product_id", {"product_id": {"$type": "string"}})
+        for product_id in ids:
+            if ObjectId.is_valid(product_id):
+                converted += db[name].update_many(
+                    {"product_id": product_id},
+                    {"$set": {"product_id": ObjectId(product_id)}}
+                ).modified_count
+
+    progress(0.4, "Comparing batch totals with the ledger")
+    mismatches = [m for m in find_inconsistencies() if m["counter_quantity"] is not None]
+
+    repaired = skipped = 0
+    rebuild_summary = False
+    for i, m in enumerate(mismatches):
+        progress(0.5 + 0.5 * i / len(mismatches), f"Repairing batch {i + 1}/{len(mismatches)}")
+        if not math.isfinite(m["ledger_amount"]):
+            skipped += 1
+            continue
+        qty = m["ledger_quantity"] - m["counter_quantity"]
+        amount = m["ledger_amount"] - m["counter_amount"]
+        # Counters never written read as 0; None also matches a missing field
+        unchanged = {
+            "_id": m["product_id"],
+            "total_quantity_sold": {"$in": [m["counter_quantity"]] + ([None] if not m["counter_quantity"] else [])},
+            "total_amount_sold": {"$in": [m["counter_amount"]] + ([None] if not m["counter_amount"] else [])}
+        }
+        fix = {"$inc": {"total_quantity_sold": qty, "total_amount_sold": amount, "stock_quantity": -qty}}
+        if not math.isfinite(amount):
+            fix = {"$inc": {"total_quantity_sold": qty, "stock_quantity": -qty},
+                   "$set": {"total_amount_sold": m["ledger_amount"]}}
+        if db.products.update_one(unchanged, fix).matched_count:
+            repaired += 1
+        elif db[ARCHIVES["products"]].update_one(unchanged, fix).matched_count:
+            # Archived batches also feed the running archive summary
+            if math.isfinite(amount):
+                db.archive_summary.update_one(
+                    {"_id": SUMMARY_ID},
+                    {"$inc": {"total_quantity_sold": qty, "total_amount_sold": amount}},
+                    upsert=True
+                )
+            else:
+                rebuild_summary = True
+            repaired += 1
+        else:
+            skipped += 1
+
+    if rebuild_summary:
+        # A NaN summed into the summary can't be subtracted back out
+        archive.rebuild_summary()
+
+    progress(1.0, f"Converted {converted} sales, repaired {repaired} batches, skipped {skipped}")
+    return {"converted": converted, "repaired": repaired, "skipped": skipped}
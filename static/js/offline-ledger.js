@@ -0,0 +1,310 @@
+// Offline sales ledger.
+// Keeps the active batches and any sales that could not reach the server in
+// IndexedDB, then sends all pending sales to /sales/sync in one request
+// once the server answers again. Each sale carries an idempotency key, so a
+// sync that is retried never double-counts on the server, and the id of the
+// seller who logged it, so it is only ever synced (and credited) by them.
+const OfflineLedger = (() => {
+  const DB_NAME = "emeka-ledger";
+  const DB_VERSION = 1;
+  // Must match PAGE_CACHE in service-worker.js
+  const PAGE_CACHE = "emeka-pages-v1";
+  const SUBMIT_TIMEOUT_MS = 15000;
+  const RETRY_MS = 30000;
+  let dbPromise = null;
+  // False after a request failed at the network level, until one succeeds
+  let reachable = true;
+
+  function openDb() {
+    if (!dbPromise) {
+      dbPromise = new Promise((resolve, reject) => {
+        const req = indexedDB.open(DB_NAME, DB_VERSION);
+        req.onupgradeneeded = () => {
+          const db = req.result;
+          if (!db.objectStoreNames.contains("products")) {
+            db.createObjectStore("products", { keyPath: "id" });
+          }
+          if (!db.objectStoreNames.contains("sales")) {
+            db.createObjectStore("sales", { keyPath: "idempotency_key" });
+          }
+        };
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => reject(req.error);
+      });
+    }
+    return dbPromise;
+  }
+
+  async function withStore(name, mode, fn) {
+    const db = await openDb();
+    return new Promise((resolve, reject) => {
+      const tx = db.transaction(name, mode);
+      const result = fn(tx.objectStore(name));
+      tx.oncomplete = () => resolve(result && "result" in result ? result.result : undefined);
+      tx.onerror = () => reject(tx.error);
+    });
+  }
+
+  function newKey() {
+    if (window.crypto && crypto.randomUUID) return crypto.randomUUID();
+    return Date.now().toString(36) + "-" + Math.random().toString(36).slice(2, 12);
+  }
+
+  function currentUser() {
+    return document.body.dataset.userId || null;
+  }
+
+  function isJson(res) {
+    return (res.headers.get("content-type") || "").includes("json");
+  }
+
+  async function saveProducts(products) {
+    await withStore("products", "readwrite", store => {
+      store.clear();
+      products.forEach(p => store.put(p));
+    });
+  }
+
+  function getProducts() {
+    return withStore("products", "readonly", store => store.getAll());
+  }
+
+  function getSales() {
+    return withStore("sales", "readonly", store => store.getAll());
+  }
+
+  // This seller's sales, plus any queued before sales carried a seller
+  // (the server records those without crediting anyone)
+  async function mySales() {
+    const user = currentUser();
+    return (await getSales()).filter(s => !s.user_id || s.user_id === user);
+  }
+
+  async function queueSale(productId, quantity, amount, key) {
+    const sale = {
+      idempotency_key: key || newKey(),
+      user_id: currentUser(),
+      product_id: productId,
+      quantity: parseInt(quantity, 10),
+      amount: parseFloat(amount),
+      recorded_at: new Date().toISOString(),
+      status: "pending"
+    };
+    await withStore("sales", "readwrite", store => store.put(sale));
+    await showStatus();
+    return sale;
+  }
+
+  async function refreshProducts() {
+    const res = await fetch("/sales/api/products", { credentials: "same-origin" });
+    if (res.ok && isJson(res)) {
+      await saveProducts((await res.json()).products);
+    }
+  }
+
+  let syncing = false;
+
+  // Tried on load, on reconnect, when the page becomes visible and every
+  // RETRY_MS while sales are pending: navigator.onLine stays true when the
+  // Wi-Fi is up but its uplink is not, so it can't be trusted alone.
+  async function sync() {
+    if (syncing || !currentUser()) return;
+    syncing = true;
+    try {
+      const pending = (await mySales()).filter(s => s.status === "pending");
+      if (!pending.length) {
+        await refreshProducts();
+        reachable = true;
+        return;
+      }
+      const res = await fetch("/sales/sync", {
+        method: "POST",
+        credentials: "same-origin",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ sales: pending })
+      });
+      reachable = true;
+      if (!res.ok || !isJson(res)) return;
+      const body = await res.json();
+
+      await withStore("sales", "readwrite", store => {
+        body.results.forEach(r => {
+          if (r.status === "applied" || r.status === "duplicate") {
+            store.delete(r.idempotency_key);
+          } else if (r.status === "rejected") {
+            const sale = pending.find(s => s.idempotency_key === r.idempotency_key);
+            if (sale) store.put(Object.assign({}, sale, { status: "rejected", reason: r.reason }));
+          }
+        });
+      });
+      await saveProducts(body.products);
+    } catch (err) {
+      reachable = false;
+      console.log("Offline ledger sync failed: ", err);
+    } finally {
+      syncing = false;
+      await showStatus();
+    }
+  }
+
+  async function discardRejected() {
+    const user = currentUser();
+    await withStore("sales", "readwrite", store => {
+      store.getAll().onsuccess = e => e.target.result
+        .filter(s => s.status === "rejected" && (!s.user_id || s.user_id === user))
+        .forEach(s => store.delete(s.idempotency_key));
+    });
+    await showStatus();
+  }
+
+  // Drops everything on this device that belongs to a session: cached
+  // pages, the batch list and rejected sales. Unsynced sales stay, tagged
+  // with their seller, until that seller syncs them.
+  async function clearSession() {
+    if ("caches" in window) await caches.delete(PAGE_CACHE);
+    await withStore("products", "readwrite", store => store.clear());
+    await withStore("sales", "readwrite", store => {
+      store.getAll().onsuccess = e => e.target.result
+        .filter(s => s.status !== "pending")
+        .forEach(s => store.delete(s.idempotency_key));
+    });
+  }
+
+  async function logout(href) {
+    await Promise.race([sync(), new Promise(resolve => setTimeout(resolve, 5000))]);
+    const left = (await mySales()).filter(s => s.status === "pending").length;
+    if (left && !confirm(`${left} sale(s) have not synced yet. They stay on this device and ` +
+                         "will sync the next time you log in here. Log out now?")) {
+      return;
+    }
+    await clearSession();
+    window.location.href = href;
+  }
+
+  async function showStatus() {
+    const el = document.getElementById("offline-status");
+    if (!el) return;
+    const sales = await mySales();
+    const pending = sales.filter(s => s.status === "pending").length;
+    const rejected = sales.filter(s => s.status === "rejected");
+    const parts = [];
+    if (!navigator.onLine || !reachable) parts.push("Can't reach the server. Sales will be saved on this device.");
+    if (pending) parts.push(`${pending} sale(s) waiting to sync.`);
+    if (rejected.length) {
+      parts.push(`${rejected.length} sale(s) could not be synced: ` +
+        rejected.map(s => s.reason || "rejected").join("; ") + ".");
+    }
+    el.textContent = parts.join(" ");
+    if (rejected.length) {
+      const btn = document.createElement("a");
+      btn.href = "#";
+      btn.textContent = " Dismiss";
+      btn.onclick = e => { e.preventDefault(); discardRejected(); };
+      el.appendChild(btn);
+    }
+    el.hidden = parts.length === 0;
+  }
+
+  // Sale forms marked data-offline-sale are posted with fetch. If the
+  // server can't be reached, fails, or the session has expired, the sale is
+  // queued locally under the same idempotency key, so it counts once even
+  // if the post landed.
+  function bindForms() {
+    document.querySelectorAll("form[data-offline-sale]").forEach(form => {
+      form.addEventListener("submit", async e => {
+        e.preventDefault();
+        const button = form.querySelector("[type=submit]");
+        if (button) button.disabled = true;
+        const data = new FormData(form);
+        const key = newKey();
+        data.set("idempotency_key", key);
+
+        let res = null;
+        const controller = new AbortController();
+        const timer = setTimeout(() => controller.abort(), SUBMIT_TIMEOUT_MS);
+        try {
+          res = await fetch(form.action, {
+            method: "POST",
+            body: data,
+            credentials: "same-origin",
+            headers: { "X-Offline-Ledger": "1" },
+            signal: controller.signal
+          });
+          reachable = true;
+        } catch (err) {
+          reachable = false;
+        } finally {
+          clearTimeout(timer);
+        }
+
+        // The sale routes answer this post with JSON. Anything else (an
+        // expired session redirected to the login page, a server error) means
+        // the sale was not recorded
+        const body = res && res.ok && isJson(res) ? await res.json() : null;
+        if (!body || !body.redirect) {
+          const productId = form.dataset.productId || data.get("product_id");
+          await queueSale(productId, data.get("quantity"), data.get("amount"), key);
+          form.reset();
+          if (button) button.disabled = false;
+          const expired = res && res.redirected && new URL(res.url).pathname.startsWith("/auth/login");
+          if (expired) {
+            alert("Your session has expired: sale saved on this device. Log in again to sync it.");
+            window.location.href = res.url;
+          } else {
+            alert("Couldn't reach the server: sale saved on this device and will sync automatically.");
+          }
+          return;
+        }
+        window.location.href = body.redirect;
+      });
+    });
+  }
+
+  function bindLogout() {
+    document.querySelectorAll('a[href$="/auth/logout"]').forEach(link => {
+      link.addEventListener("click", e => {
+        e.preventDefault();
+        logout(link.href);
+      });
+    });
+  }
+
+  // Offline, the batch picker is filled from the local product list
+  async function fillProductSelects() {
+    const products = await getProducts();
+    if (!products.length) return;
+    document.querySelectorAll("select[data-offline-products]").forEach(select => {
+      if (navigator.onLine && select.options.length) return;
+      select.innerHTML = "";
+      products.forEach(p => select.add(new Option(p.name, p.id)));
+    });
+  }
+
+  function init() {
+    if (!("indexedDB" in window)) return;
+    if (!document.body.dataset.auth) {
+      // Logged out (or the session expired): nothing private stays cached
+      clearSession();
+      return;
+    }
+    bindForms();
+    bindLogout();
+    fillProductSelects();
+    showStatus();
+    window.addEventListener("online", sync);
+    window.addEventListener("offline", showStatus);
+    document.addEventListener("visibilitychange", () => {
+      if (document.visibilityState === "visible") sync();
+    });
+    setInterval(async () => {
+      if ((await mySales()).some(s => s.status === "pending")) sync();
+    }, RETRY_MS);
+    sync();
+    // Keep the quick-sale page in the service worker cache for offline use
+    if (navigator.onLine) fetch("/sales/quick-sale", { credentials: "same-origin", headers: { Accept: "text/html" } }).catch(() => {});
+  }
+
+  document.addEventListener("DOMContentLoaded", init);
+
+  return { queueSale, sync, getSales, getProducts, logout };
+})();
@@ -1,33 +1,69 @@
-const CACHE_NAME = "emeka-ok-service-v1";
+const CACHE_NAME = "emeka-ok-service-v3";
+// Pages live in their own cache so logout can drop them (offline-ledger.js)
+const PAGE_CACHE = "emeka-pages-v1";
 const urlsToCache = [
-  "/",
-  "/products/dashboard",
-  "/auth/login",
   "/static/css/style.css",
-  "/static/js/pwa.js"
+  "/static/js/pwa.js",
+  "/static/js/offline-ledger.js",
+  "/static/manifest.json"
 ];
+// Only the pages a seller needs to log sales offline are kept. Admin,
+// analytics and report pages are never cached.
+const OFFLINE_PAGES = ["/products/dashboard", "/sales/quick-sale", "/sales/log/"];
+
+function isOfflinePage(url) {
+  return OFFLINE_PAGES.some(p => p.endsWith("/") ? url.pathname.startsWith(p) : url.pathname === p);
+}
 
 // Install service worker
 self.addEventListener("install", event => {
   event.waitUntil(
     caches.open(CACHE_NAME).then(cache => cache.addAll(urlsToCache))
   );
+  self.skipWaiting();
 });
 
-// Fetch cache-first strategy
+// Seller pages: network-first, falling back to the last cached copy when
+// offline. Other pages: network only. Static files: cache-first. API calls
+// and POSTs always go to the network; offline sales are queued in
+// IndexedDB by offline-ledger.js instead.
 self.addEventListener("fetch", event => {
+  const request = event.request;
+  const url = new URL(request.url);
+  if (request.method !== "GET" || url.origin !== self.location.origin) return;
+  if (url.pathname.startsWith("/sales/api/") || url.pathname.startsWith("/admin/api/")) return;
+
+  if (request.mode === "navigate" || (request.headers.get("accept") || "").includes("text/html")) {
+    if (!isOfflinePage(url)) return;
+    event.respondWith(
+      fetch(request)
+        .then(response => {
+          if (response.ok && !response.redirected) {
+            const copy = response.clone();
+            caches.open(PAGE_CACHE).then(cache => cache.put(request, copy));
+          }
+          return response;
+        })
+        .catch(() => caches.open(PAGE_CACHE).then(cache =>
+          cache.match(request).then(cached => cached || cache.match("/products/dashboard"))
+        ).then(cached => cached || Response.error()))
+    );
+    return;
+  }
+
   event.respondWith(
-    caches.match(event.request).then(response => {
-      return response || fetch(event.request);
+    caches.match(request).then(response => {
+      return response || fetch(request);
     })
   );
 });
 
-// Update service worker
+// Update service worker; older caches (including v2, which held every
+// page) are dropped
 self.addEventListener("activate", event => {
   event.waitUntil(
     caches.keys().then(keys =>
-      Promise.all(keys.map(k => k !== CACHE_NAME && caches.delete(k)))
-    )
+      Promise.all(keys.map(k => k !== CACHE_NAME && k !== PAGE_CACHE && caches.delete(k)))
+    ).then(() => self.clients.claim())
   );
 });
@@ -0,0 +1,157 @@
+# utils/analytics.py
+from datetime import datetime
+from utils.db import get_db
+
+# NumPy is imported inside the functions below so that loading the
+# analytics blueprint doesn't pay for it at boot.
+
+# Only the fields the metrics need; never pull the embedded sales arrays
+PRODUCT_FIELDS = {
+    "name": 1,
+    "status": 1,
+    "batch_cost": 1,
+    "stock_quantity": 1,
+    "total_quantity_sold": 1,
+    "total_amount_sold": 1,
+    "created_at": 1
+}
+
+SECONDS_PER_DAY = 86400.0
+
+
+def load_batches(db=None, include_archived=False):
+    """
+    Pulls every batch plus its first/last sale date in two bulk queries
+    (four with include_archived, which adds products_archive/sales_archive).
+    Returns (products, spans) where spans maps str(product_id) -> (first, last).
+    """
+    db = db if db is not None else get_db()
+    sources = [("products", "sales")]
+    if include_archived:
+        sources.append(("products_archive", "sales_archive"))
+
+    pipeline = [
+        {"$group": {
+            "_id": "$product_id",
+            "first_sale": {"$min": "$date"},
+            "last_sale": {"$max": "$date"}
+        }}
+    ]
+    products, spans = [], {}
+    for products_name, sales_name in sources:
+        products.extend(db[products_name].find({}, PRODUCT_FIELDS).sort("created_at", -1))
+        for r in db[sales_name].aggregate(pipeline):
+            key = str(r["_id"])
+            first, last = spans.get(key, (r["first_sale"], r["last_sale"]))
+            spans[key] = (min(first, r["first_sale"]), max(last, r["last_sale"]))
+    return products, spans
+
+
+def _timestamps(values, fallback):
+    import numpy as np
+    return np.array(
+        [(v or fallback).timestamp() for v in values], dtype=np.float64
+    )
+
+
+def compute_batch_metrics(products, spans=None, now=None):
+    """
+    Computes per-batch metrics for all batches at once.
+    Returns a dict of equal-length NumPy columns:
+    profit, margin, sell_through, days_to_sell_out, revenue_per_day
+    alongside the raw columns they were derived from.
+    Margin, sell-through and days-to-sell-out are NaN where undefined.
+    """
+    import numpy as np
+
+    spans = spans or {}
+    now = now or datetime.utcnow()
+
+    revenue = np.array([float(p.get("total_amount_sold", 0) or 0) for p in products], dtype=np.float64)
+    cost = np.array([float(p.get("batch_cost", 0) or 0) for p in products], dtype=np.float64)
+    sold = np.array([float(p.get("total_quantity_sold", 0) or 0) for p in products], dtype=np.float64)
+    stock = np.array([float(p.get("stock_quantity", 0) or 0) for p in products], dtype=np.float64)
+    finished = np.array([p.get("status") == "finished" for p in products], dtype=bool)
+
+    created = _timestamps([p.get("created_at") for p in products], now)
+    last_sale = _timestamps([spans.get(str(p["_id"]), (None, None))[1] for p in products], now)
+    now_ts = now.timestamp()
+
+    sold_out = finished | ((stock <= 0) & (sold > 0))
+    # Days the batch has been selling: up to its last sale once sold out, else up to now
+    end = np.where(sold_out, last_sale, now_ts)
+    elapsed = np.maximum((end - created) / SECONDS_PER_DAY, 1.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        profit = revenue - cost
+        margin = np.where(revenue > 0, profit / revenue, np.nan)
+        on_hand = sold + np.maximum(stock, 0)
+        sell_through = np.where(on_hand > 0, sold / on_hand, np.nan)
+        daily_units = sold / elapsed
+        # Actual duration for sold-out batches, projected at the average rate otherwise
+        projected = elapsed + np.maximum(stock, 0) / daily_units
+        days_to_sell_out = np.where(
+            sold_out, elapsed, np.where(daily_units > 0, projected, np.nan)
+        )
+        revenue_per_day = revenue / elapsed
+
+    return {
+        "ids": [p["_id"] for p in products],
+        "names": [p.get("name", "") for p in products],
+        "statuses": [p.get("status", "active") for p in products],
+        "revenue": revenue,
+        "cost": cost,
+        "quantity": sold,
+        "stock": stock,
+        "profit": profit,
+        "margin": margin,
+        "sell_through": sell_through,
+        "days_to_sell_out": days_to_sell_out,
+        "revenue_per_day": revenue_per_day
+    }
+
+
+def batch_metrics(db=None, now=None, include_archived=False):
+    products, spans = load_batches(db, include_archived)
+    return compute_batch_metrics(products, spans, now)
+
+
+def metrics_totals(metrics):
+    revenue = float(metrics["revenue"].sum())
+    cost = float(metrics["cost"].sum())
+    return {
+        "total_revenue": revenue,
+        "total_cost": cost,
+        "total_profit": revenue - cost,
+        "total_quantity": int(metrics["quantity"].sum())
+    }
+
+
+def metrics_rows(metrics):
+    """
+    Converts the columns back into one dict per batch for templates and CSV,
+    with NaN replaced by None.
+    """
+    import numpy as np
+
+    def clean(v):
+        v = float(v)
+        return None if np.isnan(v) else v
+
+    rows = []
+    for i, _id in enumerate(metrics["ids"]):
+        rows.append({
+            "_id": _id,
+            "name": metrics["names"][i],
+            "status": metrics["statuses"][i],
+            "batch_cost": float(metrics["cost"][i]),
+            "stock_quantity": int(metrics["stock"][i]),
+            "total_quantity_sold": int(metrics["quantity"][i]),
+            "total_amount_sold": float(metrics["revenue"][i]),
+            "profit": float(metrics["profit"][i]),
+            "margin": clean(metrics["margin"][i]),
+            "sell_through": clean(metrics["sell_through"][i]),
+            "days_to_sell_out": clean(metrics["days_to_sell_out"][i]),
+            "revenue_per_day": float(metrics["revenue_per_day"][i])
+        })
+    return rows
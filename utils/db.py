@@ -1,8 +1,86 @@
-from pymongo import MongoClient
+import functools
+import threading
 from config import Config
 
-client = MongoClient(Config.MONGO_URI)
-db = client["emekaokservice"]
+_client = None
+_db = None
+_override = None
+_lock = threading.Lock()
+
+
+def _connect():
+    """
+    Creates the MongoClient on first use. pymongo is imported here so that
+    importing the app (and every model) never waits on it or on the network.
+    """
+    global _client, _db
+    with _lock:
+        if _db is None:
+            from pymongo import MongoClient
+            _client = MongoClient(
+                Config.MONGO_URI,
+                connect=False,
+                serverSelectionTimeoutMS=Config.MONGO_TIMEOUT_MS
+            )
+            _db = _client[Config.MONGO_DB_NAME]
+    return _db
+
+
+def _current():
+    if _override is not None:
+        return _override
+    return _db if _db is not None else _connect()
+
+
+class _LazyDatabase:
+    """
+    Stand-in for the pymongo Database that models bind at import time.
+    Attribute and item access are forwarded to the real database, which is
+    only connected on first use.
+    """
+
+    def __getattr__(self, name):
+        return getattr(_current(), name)
+
+    def __getitem__(self, name):
+        return _current()[name]
+
+    def __repr__(self):
+        return f"<lazy database {Config.MONGO_DB_NAME!r}>"
+
+
+db = _LazyDatabase()
 
 def get_db():
     return db
+
+@functools.lru_cache(maxsize=None)
+def driver():
+    """
+    The pymongo module, imported on first use. Write paths reach its
+    constants and exceptions through here (driver().ReturnDocument,
+    driver().errors.DuplicateKeyError) so importing a model stays cheap.
+    """
+    import pymongo
+    import pymongo.errors
+    return pymongo
+
+def set_db(database):
+    """
+    Points every model at another database (benchmarks, scratch runs).
+    Pass None to go back to the configured MongoDB.
+    """
+    global _override
+    _override = database
+
+def reset_client():
+    """
+    Drops the current client so the next access reconnects. Call in forked
+    workers: MongoClient is not fork-safe.
+    """
+    global _client, _db
+    with _lock:
+        if _client is not None:
+            _client.close()
+        _client = None
+        _db = None